@@ -0,0 +1,76 @@
+import multiprocessing
+
+import degrees
+from util import path_from_tree
+
+
+def breadth_first_tree(source, targets=None):
+    """
+    Breadth first search from the source.
+
+    Returns a dictionary mapping every reached person_id to the
+    (movie_id, person_id) step towards the source, None for the source.
+    If `targets` is given, the search stops once all of them are reached.
+    """
+    parents = {source: None}
+    remaining = set(targets) - {source} if targets is not None else None
+    if remaining is not None and not remaining:
+        return parents
+
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for current in frontier:
+            for movie_id in degrees.movies_for_person(current):
+                for person_id in degrees.stars_for_movie(movie_id):
+                    if person_id in parents:
+                        continue
+                    parents[person_id] = (movie_id, current)
+                    next_frontier.append(person_id)
+                    if remaining is not None:
+                        remaining.discard(person_id)
+                        if not remaining:
+                            return parents
+        frontier = next_frontier
+
+    return parents
+
+
+def paths_from_source(group):
+    """
+    Answers every target of a (source, targets) group from one search.
+    """
+    source, targets = group
+    parents = breadth_first_tree(source, targets)
+    return source, {target: path_from_tree(parents, target) for target in targets}
+
+
+def load_worker(directory, compact):
+    """
+    Loads the dataset in a pool worker that did not inherit it.
+    """
+    degrees.load_data(directory, compact)
+
+
+def batch_shortest_paths(pairs, processes=None, directory=None, compact=False):
+    """
+    Returns the shortest path for every (source, target) pair, in order.
+
+    Pairs are grouped by source so that each source is searched only once.
+    If `processes` is given, the groups are spread over a pool of that many
+    worker processes. Workers inherit the loaded data where processes are
+    forked; elsewhere pass the dataset `directory` so each worker loads it.
+    """
+    pairs = list(pairs)
+    groups = {}
+    for source, target in pairs:
+        groups.setdefault(source, set()).add(target)
+
+    if processes is None:
+        answers = dict(map(paths_from_source, groups.items()))
+    else:
+        initializer = load_worker if directory is not None else None
+        with multiprocessing.Pool(processes, initializer, (directory, compact)) as pool:
+            answers = dict(pool.imap_unordered(paths_from_source, groups.items()))
+
+    return [answers[source][target] for source, target in pairs]
@@ -0,0 +1,251 @@
+import argparse
+import csv
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from landmarks import LandmarkIndex
+
+# Search strategies: (load_data keyword arguments, shortest_path algorithm)
+STRATEGIES = {
+    "bfs": ({}, "bfs"),
+    "bidirectional": ({}, "bidirectional"),
+    "astar": ({}, "astar"),
+    "compact": ({"compact": True}, "bfs"),
+    "compact-bidirectional": ({"compact": True}, "bidirectional"),
+    "sqlite": ({"use_sqlite": True}, "bfs"),
+}
+
+
+def legacy_load_data(directory):
+    """
+    The original csv.DictReader based loader, kept as a baseline.
+    """
+    names, people, movies = {}, {}, {}
+
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {row["id"]}
+            else:
+                names[row["name"].lower()].add(row["id"])
+
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+
+    return names, people, movies
+
+
+def best_time(function, repeat):
+    """
+    Returns the fastest of `repeat` timed calls of a function.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def benchmark_ingest(directory, repeat=3):
+    """
+    Compares the streaming loader of degrees.py with the legacy loader.
+    """
+    legacy = best_time(lambda: legacy_load_data(directory), repeat)
+    streaming = best_time(lambda: degrees.load_data(directory), repeat)
+    compact = best_time(lambda: degrees.load_data(directory, compact=True), repeat)
+
+    print(f"legacy DictReader loader: {legacy:.3f}s")
+    print(f"streaming loader:         {streaming:.3f}s ({legacy / streaming:.2f}x)")
+    print(f"streaming compact loader: {compact:.3f}s ({legacy / compact:.2f}x)")
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a sorted list of values.
+    """
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+def count_expansions(counter):
+    """
+    Wraps the degrees accessors that searches call once per expanded
+    person, so that `counter[0]` counts them. Returns a function that
+    restores the originals.
+
+    The compact graph searches its arrays directly, so it is not counted;
+    the SQLite store is counted per person whose movies it reads.
+    """
+    movies_for_person = degrees.movies_for_person
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counted_movies(person_id):
+        counter[0] += 1
+        return movies_for_person(person_id)
+
+    def counted_neighbors(person_id, *args):
+        counter[0] += 1
+        return neighbors_for_person(person_id, *args)
+
+    degrees.movies_for_person = counted_movies
+    degrees.neighbors_for_person = counted_neighbors
+    store_movies = None
+    if degrees.store is not None:
+        store_movies = degrees.store.movies_for_people
+
+        def counted_store(person_ids):
+            counter[0] += len(person_ids)
+            return store_movies(person_ids)
+
+        degrees.store.movies_for_people = counted_store
+
+    def restore():
+        degrees.movies_for_person = movies_for_person
+        degrees.neighbors_for_person = neighbors_for_person
+        if store_movies is not None:
+            del degrees.store.movies_for_people
+
+    return restore
+
+
+def benchmark_strategy(directory, name, pairs):
+    """
+    Loads the dataset for a strategy and times a shortest_path query for
+    each pair without the path cache.
+
+    Memory is measured with tracemalloc in a second load, so that tracing
+    does not slow down the timed one; it does not see the memory SQLite
+    allocates itself.
+    """
+    options, algorithm = STRATEGIES[name]
+
+    start = time.perf_counter()
+    degrees.load_data(directory, **options)
+    load_seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        degrees.load_data(directory, **options)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    if algorithm == "astar":
+        degrees.landmark_index = LandmarkIndex.build()
+
+    counter = [0]
+    restore = count_expansions(counter)
+    latencies = []
+    connected = 0
+    try:
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = degrees.shortest_path(source, target, algorithm=algorithm,
+                                         use_cache=False)
+            latencies.append(time.perf_counter() - start)
+            if path is not None:
+                connected += 1
+    finally:
+        restore()
+        degrees.landmark_index = None
+
+    latencies.sort()
+    return {
+        "load_seconds": load_seconds,
+        "peak_memory_bytes": peak_memory,
+        "nodes_expanded": None if options.get("compact") else counter[0],
+        "connected": connected,
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / len(latencies) if latencies else None,
+            "p50": 1000 * percentile(latencies, 0.5) if latencies else None,
+            "p90": 1000 * percentile(latencies, 0.9) if latencies else None,
+            "p99": 1000 * percentile(latencies, 0.99) if latencies else None,
+            "max": 1000 * latencies[-1] if latencies else None,
+        },
+    }
+
+
+def benchmark_search(directory, queries=100, strategies=None, seed=0):
+    """
+    Runs the same random queries against each search strategy.
+
+    Returns a JSON-serializable dictionary of results per strategy.
+    """
+    degrees.load_data(directory)
+    person_ids = sorted(degrees.all_person_ids())
+    rng = random.Random(seed)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(queries)]
+
+    results = {
+        "directory": directory,
+        "people": len(person_ids),
+        "queries": queries,
+        "strategies": {},
+    }
+    for name in strategies or STRATEGIES:
+        results["strategies"][name] = benchmark_strategy(directory, name, pairs)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading and searching a degrees dataset.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="compare the CSV loaders")
+    ingest.add_argument("directory", nargs="?", default="large")
+
+    search = commands.add_parser("search", help="compare the search strategies")
+    search.add_argument("directory", nargs="?", default="large")
+    search.add_argument("--queries", type=int, default=100)
+    search.add_argument("--strategy", action="append", choices=list(STRATEGIES),
+                        help="strategy to run (default: all), may be repeated")
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        benchmark_ingest(args.directory)
+        return
+
+    results = benchmark_search(args.directory, args.queries, args.strategy, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    for name, result in results["strategies"].items():
+        latency = result["latency_ms"]
+        print(f"{name:14} load {result['load_seconds']:.3f}s, "
+              f"peak {result['peak_memory_bytes'] / 2 ** 20:.1f} MiB, "
+              f"p50 {latency['p50']:.2f}ms, p99 {latency['p99']:.2f}ms",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
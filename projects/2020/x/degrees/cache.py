@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Marks a pair that is not in the cache, since None is a cached "not connected"
+MISSING = object()
+
+
+class PathCache():
+    """
+    Bounded least recently used cache of shortest path results.
+
+    Each unordered pair of people is stored once, since the path from B to A
+    is the reverse of the path from A to B. The cache is emptied whenever
+    it is told about a different dataset version.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.paths = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def set_version(self, version):
+        """
+        Empties the cache if the dataset version changed.
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        with self.lock:
+            self.paths.clear()
+
+    def get(self, source, target):
+        """
+        Returns the cached path from source to target, None if they are
+        cached as not connected, or MISSING if the pair is not cached.
+        """
+        key = (source, target) if source <= target else (target, source)
+        with self.lock:
+            path = self.paths.get(key, MISSING)
+            if path is MISSING:
+                self.misses += 1
+                return MISSING
+            self.paths.move_to_end(key)
+            self.hits += 1
+        if path is None:
+            return None
+        if key[0] == source:
+            return list(path)
+        return reverse_path(key[0], path)
+
+    def put(self, source, target, path):
+        """
+        Caches the path from source to target, evicting the least
+        recently used pair when the cache is full.
+        """
+        if self.maxsize <= 0:
+            return
+        if source <= target:
+            key = (source, target)
+        else:
+            key = (target, source)
+            if path is not None:
+                path = reverse_path(source, path)
+        with self.lock:
+            self.paths[key] = tuple(path) if path is not None else None
+            self.paths.move_to_end(key)
+            if len(self.paths) > self.maxsize:
+                self.paths.popitem(last=False)
+
+    def invalidate(self, affected):
+        """
+        Drops every cached pair for which affected(source, target, path)
+        is True, with path None for pairs cached as not connected.
+        """
+        with self.lock:
+            for key in [key for key, path in self.paths.items() if affected(*key, path)]:
+                del self.paths[key]
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.paths))
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the last person of a path back to its source.
+    """
+    people = [source] + [person_id for (_, person_id) in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
@@ -1,7 +1,14 @@
-import csv
+import math
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from cache import MISSING, PathCache
+from graph import Graph
+from ingest import IngestReport, read_people, read_movies, read_stars
+from nameindex import NameIndex
+from sqlitestore import SQLiteStore
+from util import Node, IndexedQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,55 +19,138 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact CSR graph, used instead of the dictionaries above when loaded
+graph = None
 
-def load_data(directory):
+# SQLiteStore the data is read from instead, when loaded with use_sqlite
+store = None
+
+# Least recently used cache of shortest_path results for the loaded dataset
+path_cache = PathCache()
+
+# NameIndex of the loaded dataset, for prefix and fuzzy name lookups
+name_index = None
+
+# Number of rows of each delta file applied with updates.apply_delta
+# since the data was loaded
+applied_deltas = {}
+
+# Optional landmarks.LandmarkIndex of the loaded dataset, used to rule out
+# disconnected pairs early and by the "astar" search algorithm
+landmark_index = None
+
+
+def load_data(directory, compact=False, use_snapshot=False, use_sqlite=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, the data is loaded into an integer-indexed
+    CSR `graph` instead of the `names`, `people` and `movies` dictionaries.
+    If `use_snapshot` is also True, the graph is memory-mapped from a binary
+    snapshot next to the CSV files, which is rebuilt when they change.
+
+    If `use_sqlite` is True, nothing is loaded into memory; the data is read
+    on demand from an indexed SQLite `store` next to the CSV files, which is
+    likewise rebuilt when they change.
+
+    Returns an `IngestReport` with the number of rows read and skipped;
+    its counts stay zero when the data comes from an up to date snapshot
+    or database.
     """
+    global graph, store, landmark_index, name_index
+    report = IngestReport()
+    landmark_index = None
+    name_index = None
+    path_cache.set_version(dataset_version(directory))
+    applied_deltas.clear()
+    names.clear()
+    people.clear()
+    movies.clear()
+    if store is not None:
+        store.close()
+        store = None
+    if use_sqlite:
+        graph = None
+        store = SQLiteStore.open(directory, report=report)
+        return report
+    if compact:
+        # The name index is built on first use, to keep startup fast
+        # and the graph small
+        if use_snapshot:
+            graph = snapshot.load_graph(directory, report)
+        else:
+            graph = Graph.from_csv(directory, report)
+        return report
+    graph = None
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    for person_id, name, birth in read_people(directory, report):
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        key = name.lower()
+        if key not in names:
+            names[key] = {person_id}
+        else:
+            names[key].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    for movie_id, title, year in read_movies(directory, report):
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+
+    # Load stars, counting rows that refer to unknown people or movies
+    for person_id, movie_id in read_stars(directory, report):
+        person = people.get(person_id)
+        movie = movies.get(movie_id)
+        if person is None:
+            report.unknown_people += 1
+        elif movie is None:
+            report.unknown_movies += 1
+        else:
+            person["movies"].add(movie_id)
+            movie["stars"].add(person_id)
+
+    get_name_index()
+    return report
+
+
+def dataset_version(directory):
+    """
+    Returns a value that identifies the dataset in a directory,
+    which changes when the CSV files are modified.
+    """
+    signature = snapshot.source_signature(directory)
+    return os.path.abspath(directory), tuple(map(tuple, signature))
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    use_sqlite = "--sqlite" in args
+    if use_sqlite:
+        args.remove("--sqlite")
+    use_snapshot = "--snapshot" in args
+    if use_snapshot:
+        args.remove("--snapshot")
+    compact = use_snapshot or "--compact" in args
+    if "--compact" in args:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [--snapshot] [--sqlite] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(directory, compact, use_snapshot, use_sqlite)
     print("Data loaded.")
+    if report.skipped:
+        print(f"Skipped {report.unknown_people} stars rows with an unknown person "
+              f"and {report.unknown_movies} with an unknown movie.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +159,9 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    # The database is searched a whole level at a time
+    algorithm = "bfs" if use_sqlite else "bidirectional"
+    path = shortest_path(source, target, algorithm=algorithm)
 
     if path is None:
         print("Not connected.")
@@ -78,79 +170,289 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
 # Implemented by me
-def shortest_path(source, target):
+def shortest_path(source, target, algorithm="bfs", use_cache=True,
+                  movie_filter=None, person_filter=None, max_depth=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `algorithm` is either "bfs" (search outwards from the source only),
+    "bidirectional" (search from both ends at once) or "astar" (search
+    guided by `landmark_index`, which must be set). Unless `use_cache`
+    is False, results are looked up in and stored to `path_cache`.
+
+    The search can be constrained without copying the graph: only movies
+    for which `movie_filter(movie_id)` is True and people other than the
+    source and target for which `person_filter(person_id)` is True are
+    used, and paths longer than `max_depth` are not considered.
+
     If no possible path, returns None.
     """
+    if algorithm not in ("bfs", "bidirectional", "astar"):
+        raise ValueError(f"Unknown search algorithm: {algorithm}")
+    if algorithm == "astar" and landmark_index is None:
+        raise ValueError("The astar search algorithm needs a landmark_index")
+
+    # Filtered searches are not cached, but a depth limit alone
+    # can be answered from the unconstrained shortest path
+    filtered = movie_filter is not None or person_filter is not None
+    use_cache = use_cache and not filtered
+    if use_cache:
+        path = path_cache.get(source, target)
+        if path is not MISSING:
+            return within_depth(path, max_depth)
+
+    if landmark_index is not None:
+        lower = landmark_index.bounds(source, target)[0]
+        if lower == math.inf:
+            return cache_path(source, target, None, use_cache)
+        if max_depth is not None and lower > max_depth:
+            return None
+
+    if filtered or max_depth is not None:
+        if person_filter is not None:
+            allowed = (lambda person_id: person_id == source or person_id == target
+                       or person_filter(person_id))
+        else:
+            allowed = None
+        if algorithm == "astar":
+            return landmark_index.astar_path(source, target, movie_filter, allowed, max_depth)
+        elif algorithm == "bidirectional":
+            return bidirectional_path(source, target, movie_filter, allowed, max_depth)
+        return breadth_first_path(source, target, movie_filter, allowed, max_depth)
+
+    if algorithm == "astar":
+        path = landmark_index.astar_path(source, target)
+    elif algorithm == "bidirectional":
+        path = bidirectional_path(source, target)
+    elif graph is not None:
+        path = graph.shortest_path(source, target)
+    elif store is not None:
+        path = store.shortest_path(source, target)
+    else:
+        path = breadth_first_path(source, target)
+
+    return cache_path(source, target, path, use_cache)
+
+
+def cache_path(source, target, path, use_cache):
+    """
+    Stores a path in the path cache if `use_cache` is True, and returns it.
+    """
+    if use_cache:
+        path_cache.put(source, target, path)
+    return path
+
+
+def within_depth(path, max_depth):
+    """
+    Returns the path, or None if it is longer than `max_depth`.
+    """
+    if path is None or max_depth is None or len(path) <= max_depth:
+        return path
+    return None
+
+
+def breadth_first_path(source, target, movie_filter=None, person_filter=None,
+                       max_depth=None):
+    """
+    Breadth first search from the source towards the target,
+    optionally constrained as described in `shortest_path`.
+    """
+    if source == target:
+        return []
 
-    # Create frontier and explored data structure and add source to frontier
-    frontier = QueueFrontier()
+    # Create frontier and explored set and add source to frontier
+    frontier = IndexedQueueFrontier()
     frontier.add(Node(source, None, None))
-    explored = StackFrontier()
+    explored = {source}
+
+    # Each movie connects all of its stars, so it only needs expanding once
+    expanded = set()
+
+    # Track the depth of the nodes being expanded, level by level
+    depth = 0
+    level_size = 1
+    next_level_size = 0
 
     # Iterate through frontier until it is empty or the target is found
     while not frontier.empty():
+        if max_depth is not None and depth >= max_depth:
+            return None
         current_node = frontier.remove()
 
-        # Check the node contains the target
-        if current_node.person_id == target:
-            # create path
-            return write_path(current_node)
+        for movie_id in movies_for_person(current_node.person_id):
+            if movie_id in expanded:
+                continue
+            expanded.add(movie_id)
+            if movie_filter is not None and not movie_filter(movie_id):
+                continue
+            for person_id in stars_for_movie(movie_id):
+                if person_id in explored:
+                    continue
+                if person_filter is not None and not person_filter(person_id):
+                    continue
+                explored.add(person_id)
+                node = Node(person_id, movie_id, current_node)
+                # Check if neighbour is target
+                if person_id == target:
+                    return write_path(node)
+                # Add neigbour to frontier
+                frontier.add(node)
+                next_level_size += 1
+
+        level_size -= 1
+        if level_size == 0:
+            depth += 1
+            level_size, next_level_size = next_level_size, 0
 
+    return None
 
-        explored.add(current_node)
 
-        neighbors = neighbors_for_person(current_node.person_id)
-        for (movie_id, person_id) in neighbors:
-            if not (explored.contains_state(person_id) or frontier.contains_state(person_id)):
-                # Check if neighbour is target
-                if person_id is target:
-                    return write_path(Node(person_id, movie_id, current_node))
-                # Add neigbour to frontier
-                frontier.add(Node(person_id, movie_id, current_node))
+def bidirectional_path(source, target, movie_filter=None, person_filter=None,
+                       max_depth=None):
+    """
+    Breadth first search from the source and the target at the same time,
+    always expanding one full level of the smaller frontier, optionally
+    constrained as described in `shortest_path`.
+    """
+    if source == target:
+        return []
+    # The compact graph searches its arrays, unless the filters need ids
+    if graph is not None and movie_filter is None and person_filter is None:
+        return graph.bidirectional_path(source, target, max_depth)
+
+    # Map each reached person to the (movie_id, person_id) step that leads
+    # back towards the side the person was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    depth = 0
+
+    while forward_frontier and backward_frontier:
+        if max_depth is not None and depth >= max_depth:
+            return None
+        depth += 1
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward, movie_filter, person_filter)
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward, movie_filter, person_filter)
+
+        if meeting is not None:
+            return within_depth(join_paths(meeting, forward, backward), max_depth)
 
     return None
 
 
+def expand_level(frontier, parents, other_parents, movie_filter=None,
+                 person_filter=None):
+    """
+    Expands every person in the frontier by one step and returns the next
+    frontier, together with the best person reached by both searches.
+    """
+    next_frontier = []
+    meeting = None
+    meeting_length = None
+    for current in frontier:
+        for movie_id in movies_for_person(current):
+            if movie_filter is not None and not movie_filter(movie_id):
+                continue
+            for person_id in stars_for_movie(movie_id):
+                if person_id in parents:
+                    continue
+                if person_filter is not None and not person_filter(person_id):
+                    continue
+                parents[person_id] = (movie_id, current)
+                next_frontier.append(person_id)
+                if person_id in other_parents:
+                    length = (chain_length(person_id, parents)
+                              + chain_length(person_id, other_parents))
+                    if meeting is None or length < meeting_length:
+                        meeting = person_id
+                        meeting_length = length
+    return next_frontier, meeting
+
+
+def chain_length(person_id, parents):
+    """
+    Returns how many steps the parent chain of a person has.
+    """
+    length = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        length += 1
+    return length
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Stitches the forward and backward parent chains, which meet at the given
+    person, into a single list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+
+    return path
+
+
 # Implemented by me
 def write_path(node):
     """
     Returns path of the target person to the source
     """
 
-    path = [(node.movie, node.person_id)]
-    node = node.parent
+    path = []
     while node.movie is not None:
-        path = [(node.movie, node.person_id)] + path
+        path.append((node.movie, node.person_id))
         node = node.parent
+    path.reverse()
 
     return path
 
 
-def person_id_for_name(name):
+def person_id_for_name(name, interactive=True, birth=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `interactive` is False, the user is never asked: typos resolve to
+    the closest name, and ambiguous names to the person born in `birth`
+    or else to the one who starred in the most movies.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if not interactive:
+        if store is not None:
+            # Names are looked up in the database rather than in memory
+            return store.resolve(name, birth)
+        return get_name_index().resolve(name, birth, rank=movie_count)
+
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -163,18 +465,199 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
-def neighbors_for_person(person_id):
+def get_name_index():
+    """
+    Returns the NameIndex of the loaded dataset, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            entries = zip(graph.person_ids, graph.names, graph.births)
+        elif store is not None:
+            entries = store.query("SELECT id, name, birth FROM people")
+        else:
+            entries = ((person_id, person["name"], person["birth"])
+                       for person_id, person in people.items())
+        name_index = NameIndex(entries)
+    return name_index
+
+
+def person_ids_for_name(name):
+    """
+    Returns the person_ids of everyone with the given name.
+    """
+    if graph is not None:
+        return graph.ids_for_name(name)
+    if store is not None:
+        return store.ids_for_name(name)
+    return list(names.get(name.lower(), set()))
+
+
+def is_person(person_id):
+    """
+    Returns True if the person_id is in the loaded dataset.
+    """
+    if graph is not None:
+        return person_id in graph.person_index
+    if store is not None:
+        return store.person(person_id) is not None
+    return person_id in people
+
+
+def neighbors_for_person(person_id, movie_filter=None, person_filter=None):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
+
+    Only movies for which `movie_filter(movie_id)` is True and people
+    for which `person_filter(person_id)` is True are included.
+
+    The searches do not use it: they walk movies_for_person and
+    stars_for_movie directly instead of building a set of pairs.
     """
-    movie_ids = people[person_id]["movies"]
+    if movie_filter is None and person_filter is None and store is None:
+        if graph is not None:
+            return graph.neighbors(person_id)
+        movie_ids = people[person_id]["movies"]
+        neighbors = set()
+        for movie_id in movie_ids:
+            for person_id in movies[movie_id]["stars"]:
+                neighbors.add((movie_id, person_id))
+        return neighbors
+
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie_id in movies_for_person(person_id):
+        if movie_filter is not None and not movie_filter(movie_id):
+            continue
+        for star_id in stars_for_movie(movie_id):
+            if person_filter is None or person_filter(star_id):
+                neighbors.add((movie_id, star_id))
     return neighbors
 
 
+def released_between(first=None, last=None):
+    """
+    Returns a movie filter accepting movies released from year `first`
+    to year `last`, inclusive; movies without a year are rejected.
+    """
+    def movie_filter(movie_id):
+        year = movie_year(movie_id)
+        if not year:
+            return False
+        year = int(year)
+        return (first is None or year >= first) and (last is None or year <= last)
+    return movie_filter
+
+
+def excluding(ids):
+    """
+    Returns a filter rejecting the given movie_ids or person_ids.
+    """
+    ids = frozenset(ids)
+    return lambda id: id not in ids
+
+
+def movies_for_person(person_id):
+    """
+    Returns the movie_ids of the movies a person starred in.
+    """
+    if graph is not None:
+        movie_ids = graph.movie_ids
+        return [movie_ids[movie] for movie in graph.movies_of(graph.person_index[person_id])]
+    if store is not None:
+        return store.movies_for_person(person_id)
+    return people[person_id]["movies"]
+
+
+def stars_for_movie(movie_id):
+    """
+    Returns the person_ids of the stars of a movie.
+    """
+    if graph is not None:
+        person_ids = graph.person_ids
+        return [person_ids[person] for person in graph.stars_of(graph.movie_index[movie_id])]
+    if store is not None:
+        return store.stars_for_movie(movie_id)
+    return movies[movie_id]["stars"]
+
+
+def person_name(person_id):
+    """
+    Returns the name of a person.
+    """
+    if graph is not None:
+        return graph.names[graph.person_index[person_id]]
+    if store is not None:
+        return store_row(store.person, person_id)[0]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    """
+    Returns the birth year of a person.
+    """
+    if graph is not None:
+        return graph.births[graph.person_index[person_id]]
+    if store is not None:
+        return store_row(store.person, person_id)[1]
+    return people[person_id]["birth"]
+
+
+def movie_year(movie_id):
+    """
+    Returns the release year of a movie.
+    """
+    if graph is not None:
+        return graph.years[graph.movie_index[movie_id]]
+    if store is not None:
+        return store_row(store.movie, movie_id)[1]
+    return movies[movie_id]["year"]
+
+
+def all_person_ids():
+    """
+    Returns the person_ids of everyone in the loaded dataset.
+    """
+    if graph is not None:
+        return list(graph.person_ids)
+    if store is not None:
+        return store.person_ids()
+    return list(people)
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        return graph.person_offsets[person + 1] - graph.person_offsets[person]
+    if store is not None:
+        return len(store.movies_for_person(person_id))
+    return len(people[person_id]["movies"])
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of a movie.
+    """
+    if graph is not None:
+        return graph.titles[graph.movie_index[movie_id]]
+    if store is not None:
+        return store_row(store.movie, movie_id)[0]
+    return movies[movie_id]["title"]
+
+
+def store_row(lookup, id):
+    """
+    Returns the row of a store lookup, raising KeyError like
+    the dictionaries do if there is no such person or movie.
+    """
+    row = lookup(id)
+    if row is None:
+        raise KeyError(id)
+    return row
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,73 @@
+import argparse
+import csv
+import os
+import random
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Daniel", "Nancy", "Matthew", "Lisa",
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson", "White",
+]
+
+
+def generate(directory, people=10000, movies=5000, cast=4, seed=0):
+    """
+    Writes a synthetic people.csv, movies.csv and stars.csv to a directory.
+
+    Casts are drawn by preferential attachment: every time a person is cast,
+    they become more likely to be cast again, which gives the heavy-tailed
+    (scale-free) movie counts of the real dataset. Casts average `cast`
+    people, and names repeat so that ambiguous names occur as well.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # One entry per person plus one more for every movie they are in
+    weighted = list(range(people))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        f.write("id,name,birth\n")
+        for person in range(people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([person + 1, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        f.write("id,title,year\n")
+        for movie in range(movies):
+            writer.writerow([movie + 1, f"Movie {movie + 1}", rng.randint(1920, 2024)])
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("person_id,movie_id\n")
+        for movie in range(movies):
+            size = min(rng.randint(1, 2 * cast - 1), people)
+            stars = set()
+            while len(stars) < size:
+                stars.add(rng.choice(weighted))
+            for person in sorted(stars):
+                f.write(f"{person + 1},{movie + 1}\n")
+            weighted.extend(stars)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic scale-free degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=10000)
+    parser.add_argument("--movies", type=int, default=5000)
+    parser.add_argument("--cast", type=int, default=4, help="average cast size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.directory, args.people, args.movies, args.cast, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+from array import array
+from functools import cached_property
+
+from ingest import read_people, read_movies, read_stars
+
+
+class StringTable():
+    """
+    Sequence of strings stored as one UTF-8 blob plus offsets.
+    Strings are only decoded when they are accessed.
+
+    Without arguments the table starts empty and grows with append,
+    with 32-bit offsets (blobs up to 4 GiB); a memory-mapped snapshot
+    passes in its read-only sections instead.
+    """
+
+    def __init__(self, blob=None, offsets=None):
+        self.blob = bytearray() if blob is None else blob
+        self.offsets = array("I", [0]) if offsets is None else offsets
+
+    def append(self, string):
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Graph():
+    """
+    Compact representation of the people/movies graph.
+
+    People and movies are interned to dense integer indices, and the
+    person -> movies and movie -> stars relations are stored as
+    compressed sparse row (CSR) arrays: the movies of person `i` are
+    `person_movies[person_offsets[i]:person_offsets[i + 1]]`, and likewise
+    for the stars of a movie. Ids, names, titles and years are kept in
+    StringTables rather than as one Python object per string.
+    """
+
+    def __init__(self, person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars):
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_ids = movie_ids
+        self.titles = titles
+        self.years = years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+    # The lookup tables are built on first use, so that a memory-mapped
+    # graph does not have to decode every string up front
+
+    @cached_property
+    def person_index(self):
+        return {person_id: i for i, person_id in enumerate(self.person_ids)}
+
+    @cached_property
+    def movie_index(self):
+        return {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+    @cached_property
+    def name_index(self):
+        name_index = {}
+        for i, name in enumerate(self.names):
+            name_index.setdefault(name.lower(), []).append(i)
+        return name_index
+
+    @classmethod
+    def from_csv(cls, directory, report=None):
+        """
+        Builds the graph from the people, movies and stars CSV files,
+        counting skipped stars rows in the optional `IngestReport`.
+        """
+        person_ids, names, births = StringTable(), StringTable(), StringTable()
+        person_index = {}
+        for person_id, name, birth in read_people(directory, report):
+            person_index[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            names.append(name)
+            births.append(birth)
+
+        movie_ids, titles, years = StringTable(), StringTable(), StringTable()
+        movie_index = {}
+        for movie_id, title, year in read_movies(directory, report):
+            movie_index[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+            titles.append(title)
+            years.append(year)
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person_id, movie_id in read_stars(directory, report):
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is None or movie is None:
+                if report is not None:
+                    if person is None:
+                        report.unknown_people += 1
+                    else:
+                        report.unknown_movies += 1
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(
+            len(person_ids), edge_people, edge_movies)
+        movie_offsets, movie_stars = transpose_csr(
+            len(movie_ids), person_offsets, person_movies)
+
+        return cls(person_ids, names, births, movie_ids, titles, years,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    def ids_for_name(self, name):
+        """
+        Returns the person_ids of everyone with the given name.
+        """
+        return [self.person_ids[i] for i in self.name_index.get(name.lower(), [])]
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices of the person with the given index.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices of the stars of the movie with the given index.
+        """
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[movie]
+            for person in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[person]))
+        return neighbors
+
+    def shortest_path(self, source, target):
+        """
+        Breadth first search over the CSR arrays.
+
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        # Parent person and movie of every reached person, -1 if unreached
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        parent_person[source] = source
+
+        # Each movie only needs to be expanded once
+        expanded = bytearray(len(self.movie_ids))
+
+        queue = array("i", [source])
+        head = 0
+        while head < len(queue):
+            current = queue[head]
+            head += 1
+            for k in range(person_offsets[current], person_offsets[current + 1]):
+                movie = person_movies[k]
+                if expanded[movie]:
+                    continue
+                expanded[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    person = movie_stars[j]
+                    if parent_person[person] != -1:
+                        continue
+                    parent_person[person] = current
+                    parent_movie[person] = movie
+                    if person == target:
+                        return self.write_path(target, parent_person, parent_movie)
+                    queue.append(person)
+
+        return None
+
+    def bidirectional_path(self, source, target, max_depth=None):
+        """
+        Breadth first search over the CSR arrays from the source and the
+        target at the same time, always expanding one full level of the
+        smaller frontier.
+
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, or None if there is none of
+        at most `max_depth` steps.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        # For each side, the parent person and movie and the distance of
+        # every reached person (-1 if unreached), and its expanded movies
+        sides = []
+        for root in (source, target):
+            parent_person = array("i", [-1]) * len(self.person_ids)
+            parent_movie = array("i", [-1]) * len(self.person_ids)
+            distance = array("i", [-1]) * len(self.person_ids)
+            parent_person[root] = root
+            distance[root] = 0
+            sides.append((parent_person, parent_movie, distance, bytearray(len(self.movie_ids))))
+        forward, backward = sides
+
+        forward_frontier = array("i", [source])
+        backward_frontier = array("i", [target])
+        depth = 0
+        meeting = -1
+        while forward_frontier and backward_frontier and meeting == -1:
+            if max_depth is not None and depth >= max_depth:
+                return None
+            depth += 1
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(forward_frontier, forward, backward[2])
+            else:
+                backward_frontier, meeting = self.expand_level(backward_frontier, backward, forward[2])
+        if meeting == -1:
+            return None
+
+        path = self.write_path(meeting, forward[0], forward[1])
+        parent_person, parent_movie = backward[0], backward[1]
+        person = meeting
+        while parent_person[person] != person:
+            path.append((self.movie_ids[parent_movie[person]],
+                         self.person_ids[parent_person[person]]))
+            person = parent_person[person]
+        return path
+
+    def expand_level(self, frontier, side, other_distance):
+        """
+        Expands every person in the frontier of one side of a bidirectional
+        search by one step. Returns the next frontier and a person reached
+        by both sides, or -1.
+        """
+        parent_person, parent_movie, distance, expanded = side
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        next_frontier = array("i")
+        for current in frontier:
+            level = distance[current] + 1
+            for k in range(person_offsets[current], person_offsets[current + 1]):
+                movie = person_movies[k]
+                if expanded[movie]:
+                    continue
+                expanded[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    person = movie_stars[j]
+                    if distance[person] != -1:
+                        continue
+                    parent_person[person] = current
+                    parent_movie[person] = movie
+                    distance[person] = level
+                    # Every person of the other side nearer than its frontier
+                    # has been expanded, so the first meeting is on a shortest path
+                    if other_distance[person] != -1:
+                        return next_frontier, person
+                    next_frontier.append(person)
+        return next_frontier, -1
+
+    def write_path(self, person, parent_person, parent_movie):
+        """
+        Returns the (movie_id, person_id) path from the search root to the person.
+        """
+        path = []
+        while parent_person[person] != person:
+            path.append((self.movie_ids[parent_movie[person]], self.person_ids[person]))
+            person = parent_person[person]
+        path.reverse()
+        return path
+
+
+def build_csr(rows, sources, targets):
+    """
+    Builds CSR offsets and values from parallel edge arrays,
+    dropping duplicate edges.
+    """
+    counts = array("i", [0]) * (rows + 1)
+    for source in sources:
+        counts[source + 1] += 1
+    for i in range(rows):
+        counts[i + 1] += counts[i]
+
+    values = array("i", [0]) * len(sources)
+    position = array("i", counts[:-1])
+    for source, target in zip(sources, targets):
+        values[position[source]] = target
+        position[source] += 1
+
+    # Sort every row and drop duplicates in place
+    offsets = array("i", [0]) * (rows + 1)
+    size = 0
+    for i in range(rows):
+        row = sorted(set(values[counts[i]:counts[i + 1]]))
+        for value in row:
+            values[size] = value
+            size += 1
+        offsets[i + 1] = size
+    del values[size:]
+
+    return offsets, values
+
+
+def transpose_csr(columns, offsets, values):
+    """
+    Returns the CSR arrays of the transpose of a CSR matrix.
+    """
+    sources = array("i")
+    for i in range(len(offsets) - 1):
+        sources.extend([i] * (offsets[i + 1] - offsets[i]))
+    return build_csr(columns, values, sources)
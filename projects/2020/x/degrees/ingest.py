@@ -0,0 +1,99 @@
+import csv
+import sys
+
+# Size of the read buffer used for the CSV files
+CHUNK_SIZE = 1 << 20
+
+
+class IngestReport():
+    """
+    Counts of the rows read from the CSV files, and of the stars rows
+    skipped because they refer to an unknown person or movie. Delta files
+    also count the rows skipped as `invalid`, such as duplicate additions.
+    """
+
+    def __init__(self):
+        self.people = 0
+        self.movies = 0
+        self.stars = 0
+        self.unknown_people = 0
+        self.unknown_movies = 0
+        self.invalid = 0
+
+    @property
+    def skipped(self):
+        return self.unknown_people + self.unknown_movies + self.invalid
+
+    def __repr__(self):
+        return (f"IngestReport(people={self.people}, movies={self.movies}, "
+                f"stars={self.stars}, unknown_people={self.unknown_people}, "
+                f"unknown_movies={self.unknown_movies}, invalid={self.invalid})")
+
+
+def read_rows(path, columns):
+    """
+    Yields tuples with the given columns of every row of a CSV file.
+
+    The file is read through a large buffer and rows are unpacked by
+    position instead of being turned into a dictionary each. Blank lines
+    are skipped and extra fields, such as from a trailing comma, ignored;
+    rows with fewer fields than the header raise ValueError.
+    """
+    with open(path, encoding="utf-8", newline="", buffering=CHUNK_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        fields = len(header)
+        if positions == list(range(len(columns))) and fields == len(columns):
+            for row in reader:
+                if len(row) == fields:
+                    yield row
+                elif len(row) > fields:
+                    yield row[:fields]
+                elif row:
+                    raise short_row(path, reader.line_num, fields, row)
+        else:
+            for row in reader:
+                if len(row) >= fields:
+                    yield tuple(row[i] for i in positions)
+                elif row:
+                    raise short_row(path, reader.line_num, fields, row)
+
+
+def short_row(path, line, fields, row):
+    return ValueError(f"{path}, line {line}: expected {fields} fields, got {len(row)}")
+
+
+def read_people(directory, report=None):
+    """
+    Yields (person_id, name, birth) for every person.
+    """
+    intern = sys.intern
+    births = {}
+    for person_id, name, birth in read_rows(f"{directory}/people.csv", ("id", "name", "birth")):
+        if report is not None:
+            report.people += 1
+        yield intern(person_id), name, births.setdefault(birth, birth)
+
+
+def read_movies(directory, report=None):
+    """
+    Yields (movie_id, title, year) for every movie.
+    """
+    intern = sys.intern
+    years = {}
+    for movie_id, title, year in read_rows(f"{directory}/movies.csv", ("id", "title", "year")):
+        if report is not None:
+            report.movies += 1
+        yield intern(movie_id), title, years.setdefault(year, year)
+
+
+def read_stars(directory, report=None):
+    """
+    Yields (person_id, movie_id) for every row of the stars file.
+    """
+    intern = sys.intern
+    for person_id, movie_id in read_rows(f"{directory}/stars.csv", ("person_id", "movie_id")):
+        if report is not None:
+            report.stars += 1
+        yield intern(person_id), intern(movie_id)
@@ -0,0 +1,275 @@
+import heapq
+import json
+import math
+import os
+import struct
+from array import array
+from functools import cached_property
+from itertools import repeat
+from operator import sub
+
+import degrees
+import snapshot
+from util import path_from_tree
+
+INDEX_FILE = "landmarks.idx"
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 1
+
+# Magic, format version and length of the JSON header that follows
+PREAMBLE = struct.Struct("<8sII")
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = 0xFFFF
+
+
+class LandmarkIndex():
+    """
+    Breadth first distances from a few hub actors (landmarks) to everyone.
+
+    By the triangle inequality, the separation of two people is at least
+    |d(L, s) - d(L, t)| and at most d(L, s) + d(L, t) for every landmark L.
+    """
+
+    def __init__(self, landmarks, person_ids, distances, signature=None):
+        self.landmarks = landmarks
+        self.person_ids = person_ids
+        self.distances = distances
+        self.signature = signature
+        self.person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    @classmethod
+    def build(cls, k=8, signature=None):
+        """
+        Builds the index for the loaded dataset, using the k people
+        who starred in the most movies as landmarks.
+        """
+        person_ids = degrees.all_person_ids()
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        landmarks = heapq.nlargest(k, person_ids, key=degrees.movie_count)
+
+        distances = []
+        for landmark in landmarks:
+            level = array("H", [UNREACHED]) * len(person_ids)
+            level[person_index[landmark]] = 0
+            frontier = [landmark]
+            depth = 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for current in frontier:
+                    for movie_id in degrees.movies_for_person(current):
+                        for person_id in degrees.stars_for_movie(movie_id):
+                            i = person_index[person_id]
+                            if level[i] == UNREACHED:
+                                level[i] = min(depth, UNREACHED - 1)
+                                next_frontier.append(person_id)
+                frontier = next_frontier
+            distances.append(level)
+
+        return cls(landmarks, person_ids, distances, signature)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation of two
+        people, in O(k). Both are math.inf if a landmark proves that they
+        are not connected; upper is math.inf if no landmark reaches them.
+        """
+        if source == target:
+            return 0, 0
+        s = self.person_index.get(source)
+        t = self.person_index.get(target)
+        lower, upper = 1, math.inf
+        if s is None or t is None:
+            # People added after the index was built
+            return lower, upper
+        for level in self.distances:
+            ds, dt = level[s], level[t]
+            if ds == UNREACHED and dt == UNREACHED:
+                continue
+            if ds == UNREACHED or dt == UNREACHED:
+                return math.inf, math.inf
+            lower = max(lower, abs(ds - dt))
+            upper = min(upper, ds + dt)
+        return lower, upper
+
+    @cached_property
+    def rows(self):
+        """
+        The distances of every person to all landmarks as one row of bytes
+        per person, capped at 255, so that A* compares them in bulk.
+        """
+        k = len(self.distances)
+        rows = bytearray(len(self.person_ids) * k)
+        for l, level in enumerate(self.distances):
+            rows[l::k] = bytes(map(min, level, repeat(255)))
+        return bytes(rows)
+
+    def astar_path(self, source, target, movie_filter=None, person_filter=None,
+                   max_depth=None):
+        """
+        A* search guided by the landmark lower bounds, ignoring paths
+        longer than `max_depth`. Like breadth_first_path, it walks
+        degrees.movies_for_person and degrees.stars_for_movie directly,
+        expanding each movie again only from a person nearer the source, and
+        only following movies and people accepted by the filters.
+
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+        """
+        if source == target:
+            return []
+        lower = self.bounds(source, target)[0]
+        if lower == math.inf or (max_depth is not None and lower > max_depth):
+            return None
+
+        # The lower bound of a person is the largest difference between
+        # its row and the target's; people added since the index was
+        # built only get the bound of 1
+        person_index = self.person_index
+        rows = self.rows
+        k = len(self.distances)
+        t = person_index.get(target)
+        target_row = rows[t * k:t * k + k] if t is not None else None
+        parents = {source: None}
+        cost = {source: 0}
+        # Cost at which the stars of each expanded movie were reached
+        expanded = {}
+        counter = 0
+        # Among equal estimates, people further from the source are nearer
+        # the target, so they go first instead of the whole plateau
+        queue = [(lower, 0, counter, source)]
+        while queue:
+            f_current, g, _, current = heapq.heappop(queue)
+            g = -g
+            if g > cost[current]:
+                # Reached again by a shorter path since it was queued
+                continue
+            if current == target:
+                return path_from_tree(parents, target)
+            g += 1
+            for movie_id in degrees.movies_for_person(current):
+                if movie_id in expanded and expanded[movie_id] <= g:
+                    continue
+                expanded[movie_id] = g
+                if movie_filter is not None and not movie_filter(movie_id):
+                    continue
+                for person_id in degrees.stars_for_movie(movie_id):
+                    if person_id in cost and cost[person_id] <= g:
+                        continue
+                    if person_filter is not None and not person_filter(person_id):
+                        continue
+                    if person_id == target:
+                        if g == f_current:
+                            # Nothing left in the queue can lead to a shorter path
+                            parents[person_id] = (movie_id, current)
+                            return path_from_tree(parents, target)
+                        h = 0
+                    else:
+                        i = person_index.get(person_id)
+                        if i is None or target_row is None:
+                            h = 1
+                        else:
+                            h = max(map(abs, map(sub, rows[i * k:i * k + k], target_row)),
+                                    default=0) or 1
+                    f = g + h
+                    if max_depth is not None and f > max_depth:
+                        continue
+                    cost[person_id] = g
+                    parents[person_id] = (movie_id, current)
+                    counter += 1
+                    heapq.heappush(queue, (f, -g, counter, person_id))
+
+        return None
+
+    def save(self, path):
+        """
+        Writes the index to a binary file.
+        """
+        header = json.dumps({
+            "signature": self.signature,
+            "landmarks": self.landmarks,
+            "people": len(self.person_ids),
+        }).encode("utf-8")
+        blob, offsets = snapshot.encode_strings(self.person_ids)
+
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.write(offsets.tobytes())
+            f.write(blob)
+            for level in self.distances:
+                f.write(level.tobytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads an index written by `save`, or returns None if it is
+        missing, damaged or was written by another format version.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < PREAMBLE.size:
+            return None
+
+        # A damaged or truncated index is rebuilt like a stale one
+        try:
+            return cls.parse(data)
+        except (ValueError, TypeError, KeyError, IndexError, struct.error):
+            return None
+
+    @classmethod
+    def parse(cls, data):
+        """
+        Returns the index in the contents of a file written by `save`,
+        or None if it was written by another format version.
+        """
+        magic, version, header_size = PREAMBLE.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        position = PREAMBLE.size
+
+        def section(size):
+            nonlocal position
+            if not 0 <= size <= len(data) - position:
+                raise ValueError("Landmark index is truncated")
+            position += size
+            return data[position - size:position]
+
+        header = json.loads(section(header_size))
+        offsets = array("q")
+        offsets.frombytes(section(8 * (header["people"] + 1)))
+        blob = section(offsets[-1])
+        person_ids = list(snapshot.StringTable(blob, offsets))
+
+        distances = []
+        for _ in header["landmarks"]:
+            level = array("H")
+            level.frombytes(section(2 * len(person_ids)))
+            distances.append(level)
+
+        return cls(header["landmarks"], person_ids, distances, header["signature"])
+
+
+def load_or_build(directory, k=8):
+    """
+    Returns the landmark index stored next to the dataset in a directory,
+    building and saving it first if it is missing or the CSV files changed.
+    The dataset must already be loaded with degrees.load_data.
+    """
+    path = os.path.join(directory, INDEX_FILE)
+    signature = snapshot.source_signature(directory)
+    index = LandmarkIndex.load(path)
+    if index is None or index.signature != signature or len(index.landmarks) != k:
+        index = LandmarkIndex.build(k, signature)
+        try:
+            index.save(path)
+        except OSError:
+            pass
+    return index
@@ -0,0 +1,193 @@
+import heapq
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+
+# Slack for comparing similarity bounds computed in floating point
+EPSILON = 1e-9
+
+
+class NameIndex():
+    """
+    Index of people's names supporting exact, prefix and fuzzy lookups.
+
+    Distinct lowercased names are kept in a sorted list for prefix search,
+    and every name is split into trigrams for fuzzy matching. People can
+    be added and removed after the index is built.
+    """
+
+    def __init__(self, entries):
+        """
+        Builds the index from (person_id, name, birth) triples.
+        """
+        self.people = {}
+        self.display = {}
+        self.births = {}
+        for person_id, name, birth in entries:
+            key = name.lower()
+            self.people.setdefault(key, []).append(person_id)
+            self.display.setdefault(key, name)
+            self.births[person_id] = birth
+
+        self.keys = sorted(self.people)
+        self.trigrams = {}
+        self.trigram_counts = {}
+        for key in self.keys:
+            self.index_trigrams(key)
+
+    def index_trigrams(self, key):
+        key_trigrams = trigrams(key)
+        self.trigram_counts[key] = len(key_trigrams)
+        for trigram in key_trigrams:
+            self.trigrams.setdefault(trigram, set()).add(key)
+
+    def add(self, person_id, name, birth):
+        """
+        Adds a person to the index.
+        """
+        key = name.lower()
+        self.births[person_id] = birth
+        if key in self.people:
+            self.people[key].append(person_id)
+            return
+        self.people[key] = [person_id]
+        self.display[key] = name
+        insort(self.keys, key)
+        self.index_trigrams(key)
+
+    def remove(self, person_id, name):
+        """
+        Removes a person from the index.
+        """
+        key = name.lower()
+        self.people[key].remove(person_id)
+        del self.births[person_id]
+        if self.people[key]:
+            return
+        del self.people[key]
+        del self.display[key]
+        del self.keys[bisect_left(self.keys, key)]
+        del self.trigram_counts[key]
+        for trigram in trigrams(key):
+            self.trigrams[trigram].discard(key)
+            if not self.trigrams[trigram]:
+                del self.trigrams[trigram]
+
+    def exact(self, name):
+        """
+        Returns the person_ids of everyone with exactly this name.
+        """
+        return list(self.people.get(name.lower(), []))
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with the prefix, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(matches) < limit and self.keys[i].startswith(prefix):
+            matches.append(self.display[self.keys[i]])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, limit=5, threshold=0.3):
+        """
+        Returns up to `limit` (similarity, name) pairs for the names most
+        similar to the given one, best first. Similarity is the Jaccard
+        index of the two names' trigram sets, and must reach `threshold`.
+
+        The names sharing the rarest trigrams of the query are scored
+        first: the results must score at least as high as the `limit`
+        best of them, which raises the threshold of the full search.
+        """
+        query = trigrams(name.lower())
+        if not query:
+            return []
+        postings = sorted((self.trigrams.get(trigram, ()) for trigram in query), key=len)
+        order = lambda match: (-match[0], match[1])
+
+        seeds = set().union(*[posting for posting in postings if posting][:2])
+        matches = heapq.nsmallest(limit, (self.score(key, postings) for key in seeds), key=order)
+        if len(matches) == limit:
+            threshold = max(threshold, matches[-1][0])
+        return heapq.nsmallest(limit, self.similar(postings, threshold), key=order)
+
+    def score(self, key, postings):
+        """
+        Returns the (similarity, name) pair of an indexed name for
+        a query given by the posting lists of its trigrams.
+        """
+        count = 0
+        for posting in postings:
+            if key in posting:
+                count += 1
+        return count / (len(postings) + self.trigram_counts[key] - count), self.display[key]
+
+    def similar(self, postings, threshold):
+        """
+        Returns the (similarity, name) pairs of every name with a
+        similarity of at least `threshold` to a query given by the
+        posting lists of its trigrams, rarest first.
+
+        A name with a similarity of at least t to a query of n trigrams
+        shares at least t * n of them and has between t * n and n / t
+        trigrams itself. So only the n - ceil(t * n) + 1 rarest trigrams of
+        the query have to be scanned to find every candidate (prefix
+        filtering), and candidates of other lengths are skipped unscored.
+        """
+        size = len(postings)
+        scanned = size - max(1, math.ceil(threshold * size - EPSILON)) + 1
+        rest = size - scanned
+        shortest = threshold * size - EPSILON
+        longest = size / threshold + EPSILON if threshold > 0 else math.inf
+
+        scored = []
+        for key, count in Counter(chain.from_iterable(postings[:scanned])).items():
+            other = self.trigram_counts[key]
+            if not shortest <= other <= longest:
+                continue
+            # A similarity of t needs t * (size + other) / (1 + t) shared
+            # trigrams, and at most `rest` more can be in the other lists
+            if (count + rest) * (1 + threshold) < threshold * (size + other) - EPSILON:
+                continue
+            for posting in postings[scanned:]:
+                if key in posting:
+                    count += 1
+            score = count / (size + other - count)
+            if score >= threshold:
+                scored.append((score, self.display[key]))
+        return scored
+
+    def resolve(self, name, birth=None, rank=None, fuzzy=True):
+        """
+        Returns a single person_id for a name without asking the user,
+        or None if there is no match.
+
+        Typos fall back to the most similar name when `fuzzy` is True.
+        Ambiguous names are narrowed down to the given birth year, and
+        then to the person with the highest `rank(person_id)`, if given.
+        """
+        person_ids = self.exact(name)
+        if not person_ids and fuzzy:
+            matches = self.fuzzy(name, limit=1)
+            if matches:
+                person_ids = self.exact(matches[0][1])
+        if birth is not None:
+            person_ids = [person_id for person_id in person_ids
+                          if self.births[person_id] == str(birth)]
+        if not person_ids:
+            return None
+        if rank is not None:
+            return max(sorted(person_ids), key=rank)
+        return min(person_ids)
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a name, padded so that
+    the start and end of each word count too.
+    """
+    padded = f"  {' '.join(name.split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
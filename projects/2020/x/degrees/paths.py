@@ -0,0 +1,80 @@
+import heapq
+import itertools
+
+import degrees
+
+
+def shortest_path_dag(source, target):
+    """
+    Layered breadth first search from the source that stops after the
+    level of the target.
+
+    Returns a dictionary mapping every reached person_id to all of its
+    (movie_id, person_id) steps from the previous level, or None if the
+    target cannot be reached.
+    """
+    depth = {source: 0}
+    predecessors = {source: []}
+    frontier = [source]
+    level = 0
+    while frontier and target not in depth:
+        level += 1
+        next_frontier = []
+        for current in frontier:
+            for movie_id in degrees.movies_for_person(current):
+                for person_id in degrees.stars_for_movie(movie_id):
+                    reached = depth.get(person_id)
+                    if reached is None:
+                        depth[person_id] = level
+                        predecessors[person_id] = [(movie_id, current)]
+                        next_frontier.append(person_id)
+                    elif reached == level:
+                        predecessors[person_id].append((movie_id, current))
+        frontier = next_frontier
+
+    if target not in depth:
+        return None
+    return predecessors
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connects the source to the target, one at a time.
+    Yields nothing if they are not connected.
+    """
+    predecessors = shortest_path_dag(source, target)
+    if predecessors is None:
+        return
+
+    # Walk the DAG backwards from the target, depth first
+    stack = [(target, [])]
+    while stack:
+        person_id, suffix = stack.pop()
+        if person_id == source:
+            yield suffix[::-1]
+            continue
+        for movie_id, parent in reversed(predecessors[person_id]):
+            stack.append((parent, suffix + [(movie_id, person_id)]))
+
+
+def k_shortest_paths(source, target, k, key=None):
+    """
+    Returns up to k shortest paths between the source and the target.
+
+    Without a `key` these are the first k paths found. Otherwise they are
+    the k paths with the smallest key(path), for example `newest_movie_year`
+    for the connections made with the oldest movies.
+    """
+    if key is None:
+        return list(itertools.islice(all_shortest_paths(source, target), k))
+    return heapq.nsmallest(k, all_shortest_paths(source, target), key=key)
+
+
+def newest_movie_year(path):
+    """
+    Returns the year of the most recent movie of a path, using 0 for
+    movies without a year.
+    """
+    years = [degrees.movie_year(movie_id) for (movie_id, _) in path]
+    return max((int(year) for year in years if year), default=0)
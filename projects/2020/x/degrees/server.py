@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import degrees
+import landmarks
+
+
+class PersonNotFound(LookupError):
+    pass
+
+
+def resolve_person(value, birth=None):
+    """
+    Returns the person_id for a person_id or a name, resolving
+    typos and ambiguous names without asking.
+    """
+    if degrees.is_person(value):
+        return value
+    person_id = degrees.person_id_for_name(value, interactive=False, birth=birth)
+    if person_id is None:
+        raise PersonNotFound(f"Person not found: {value}")
+    return person_id
+
+
+def answer(query):
+    """
+    Answers one query, a dictionary with a "source" and a "target" person
+    (person_id or name), optional "source_birth" and "target_birth" years
+    to tell apart people with the same name, an optional "algorithm" and
+    an optional "id" that is echoed back in the response.
+    """
+    response = {"id": query.get("id")}
+    for field in ("source", "target"):
+        if field not in query:
+            response["error"] = f"Missing field: {field}"
+            return response
+    algorithm = query.get("algorithm", "bidirectional")
+    if algorithm == "astar" and degrees.landmark_index is None:
+        response["error"] = "The astar algorithm needs a server started with --landmarks"
+        return response
+
+    # Only errors in the query are answered; others are bugs and propagate
+    try:
+        source = resolve_person(str(query["source"]), query.get("source_birth"))
+        target = resolve_person(str(query["target"]), query.get("target_birth"))
+        path = degrees.shortest_path(source, target, algorithm)
+    except (PersonNotFound, ValueError) as error:
+        response["error"] = str(error)
+        return response
+
+    response["source"] = source
+    response["target"] = target
+    if path is None:
+        response["degrees"] = None
+        response["path"] = None
+    else:
+        response["degrees"] = len(path)
+        response["path"] = [list(step) for step in path]
+    return response
+
+
+class Server():
+    """
+    Answers JSON-line queries against the loaded dataset,
+    running the searches in a pool of workers.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+
+    async def respond(self, line):
+        """
+        Returns the JSON response line for one query line.
+        """
+        try:
+            query = json.loads(line)
+            if not isinstance(query, dict):
+                raise ValueError("query must be a JSON object")
+        except ValueError as error:
+            return json.dumps({"id": None, "error": f"Invalid query: {error}"})
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self.executor, answer, query)
+        return json.dumps(response)
+
+    async def serve_stream(self, reader, write):
+        """
+        Answers every line of a stream concurrently, writing each
+        response as soon as it is ready.
+        """
+        tasks = set()
+
+        async def handle(line):
+            write(await self.respond(line) + "\n")
+
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            task = asyncio.create_task(handle(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        await self.serve_stream(reader, write)
+
+    async def handle_client(self, reader, writer):
+        try:
+            await self.serve_stream(
+                reader, lambda text: writer.write(text.encode("utf-8")))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_socket(self, path=None, host="127.0.0.1", port=None):
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees of separation queries as JSON lines.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--socket", help="listen on this unix socket path")
+    parser.add_argument("--port", type=int, help="listen on this local TCP port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="number of search workers")
+    parser.add_argument("--processes", action="store_true",
+                        help="use worker processes instead of threads")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--snapshot", action="store_true")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="load or build a landmark index, for astar queries")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, args.compact or args.snapshot, args.snapshot)
+    if args.landmarks:
+        degrees.landmark_index = landmarks.load_or_build(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    # Worker processes are forked after loading, so they share the data
+    if args.processes:
+        executor = ProcessPoolExecutor(args.workers)
+    else:
+        executor = ThreadPoolExecutor(args.workers)
+
+    server = Server(executor)
+    with executor:
+        if args.socket is not None or args.port is not None:
+            coroutine = server.serve_socket(args.socket, args.host, args.port)
+        else:
+            coroutine = server.serve_stdin()
+        try:
+            asyncio.run(coroutine)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
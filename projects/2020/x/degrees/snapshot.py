@@ -0,0 +1,147 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph, StringTable
+
+SNAPSHOT_FILE = "degrees.snapshot"
+SOURCE_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+
+# Magic, format version and length of the JSON header that follows
+PREAMBLE = struct.Struct("<8sII")
+
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+STRINGS = ("person_ids", "names", "births", "movie_ids", "titles", "years")
+
+
+def source_signature(directory):
+    """
+    Returns the name, modification time and size of every source CSV file.
+    """
+    signature = []
+    for name in SOURCE_FILES:
+        stat = os.stat(os.path.join(directory, name))
+        signature.append([name, stat.st_mtime_ns, stat.st_size])
+    return signature
+
+
+def load_graph(directory, report=None):
+    """
+    Returns the compact graph of a directory, memory-mapped from its snapshot.
+
+    The snapshot is (re)built from the CSV files if it is missing,
+    was written by another format version, or the CSV files changed,
+    in which case skipped rows are counted in the optional `IngestReport`.
+    """
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    signature = source_signature(directory)
+
+    graph = read_snapshot(path, signature)
+    if graph is None:
+        graph = Graph.from_csv(directory, report)
+        try:
+            write_snapshot(graph, path, signature)
+        except OSError:
+            # A read-only dataset directory just means no cache
+            pass
+    return graph
+
+
+def write_snapshot(graph, path, signature):
+    """
+    Writes the arrays and string tables of a graph to a snapshot file.
+    """
+    sections = []
+    for name in ARRAYS:
+        sections.append((name, array("i", getattr(graph, name))))
+    for name in STRINGS:
+        blob, offsets = encode_strings(getattr(graph, name))
+        sections.append((f"{name}.blob", blob))
+        sections.append((f"{name}.offsets", offsets))
+
+    # Lay the sections out one after another, aligned to 8 bytes
+    layout = {}
+    position = 0
+    for name, data in sections:
+        size = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        layout[name] = [position, size]
+        position += size + (-size % 8)
+
+    header = json.dumps({"signature": signature, "sections": layout}).encode("utf-8")
+    header += b" " * (-(PREAMBLE.size + len(header)) % 8)
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name, data in sections:
+            data = data.tobytes() if isinstance(data, array) else data
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, signature):
+    """
+    Memory-maps a snapshot file and returns its graph,
+    or None if the snapshot is missing or stale.
+    """
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < PREAMBLE.size:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+
+    # A damaged or truncated snapshot is rebuilt like a stale one
+    try:
+        return parse_snapshot(buffer, signature)
+    except (ValueError, TypeError, KeyError, struct.error):
+        return None
+
+
+def parse_snapshot(buffer, signature):
+    """
+    Returns the graph of a mapped snapshot, or None if it is stale.
+    """
+    magic, version, header_size = PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        return None
+    header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_size]))
+    if header["signature"] != signature:
+        return None
+
+    data = memoryview(buffer)[PREAMBLE.size + header_size:]
+
+    def section(name):
+        start, size = header["sections"][name]
+        if not 0 <= start <= start + size <= len(data):
+            raise ValueError(f"Snapshot section {name} is out of bounds")
+        return data[start:start + size]
+
+    arrays = {name: section(name).cast("i") for name in ARRAYS}
+    strings = {name: StringTable(section(f"{name}.blob"),
+                                 section(f"{name}.offsets").cast("q"))
+               for name in STRINGS}
+    return Graph(**strings, **arrays)
+
+
+def encode_strings(strings):
+    """
+    Returns the UTF-8 blob and offsets array of a string table.
+    """
+    if isinstance(strings, StringTable):
+        return strings.blob, array("q", strings.offsets)
+    offsets = array("q", [0])
+    parts = []
+    for string in strings:
+        part = string.encode("utf-8")
+        parts.append(part)
+        offsets.append(offsets[-1] + len(part))
+    return b"".join(parts), offsets
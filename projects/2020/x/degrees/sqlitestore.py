@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import snapshot
+from ingest import read_people, read_movies, read_stars
+from util import path_from_tree
+
+DATABASE_FILE = "degrees.sqlite"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE people (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, name_lower TEXT NOT NULL, birth TEXT
+);
+CREATE TABLE movies (id TEXT PRIMARY KEY, title TEXT NOT NULL, year TEXT);
+CREATE TABLE stars (
+    person_id TEXT NOT NULL, movie_id TEXT NOT NULL,
+    PRIMARY KEY (person_id, movie_id)
+) WITHOUT ROWID;
+"""
+
+# Created after the bulk insert, which is faster than maintaining them
+INDEXES = """
+CREATE INDEX people_name ON people (name_lower);
+CREATE INDEX stars_movie ON stars (movie_id, person_id);
+"""
+
+# Maximum number of ids bound to a single IN (...) query
+BATCH_SIZE = 500
+
+
+class SQLiteStore():
+    """
+    People, movies and stars kept in an indexed SQLite file, for datasets
+    that do not fit in memory. Adjacency lists are read in batches for a
+    whole search level at a time, and the most recently used ones are kept
+    in a bounded cache.
+    """
+
+    def __init__(self, path, cache_size=100000):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.cache_size = cache_size
+        self.person_movies = OrderedDict()
+        self.movie_stars = OrderedDict()
+
+    @classmethod
+    def open(cls, directory, cache_size=100000, report=None):
+        """
+        Opens the database next to the CSV files of a directory, (re)building
+        it first if it is missing or the CSV files changed.
+        """
+        path = os.path.join(directory, DATABASE_FILE)
+        signature = json.dumps(snapshot.source_signature(directory))
+        if read_signature(path) != signature:
+            build_database(directory, path, signature, report)
+        return cls(path, cache_size)
+
+    def query(self, sql, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def person(self, person_id):
+        """
+        Returns the (name, birth) of a person, or None if there is no such person.
+        """
+        rows = self.query("SELECT name, birth FROM people WHERE id = ?", (person_id,))
+        return rows[0] if rows else None
+
+    def movie(self, movie_id):
+        """
+        Returns the (title, year) of a movie, or None if there is no such movie.
+        """
+        rows = self.query("SELECT title, year FROM movies WHERE id = ?", (movie_id,))
+        return rows[0] if rows else None
+
+    def person_ids(self):
+        return [row[0] for row in self.query("SELECT id FROM people")]
+
+    def ids_for_name(self, name):
+        """
+        Returns the person_ids of everyone with the given name.
+        """
+        rows = self.query("SELECT id FROM people WHERE name_lower = ?", (name.lower(),))
+        return [row[0] for row in rows]
+
+    def movies_for_people(self, person_ids):
+        """
+        Returns a dictionary mapping each person_id to a tuple of their movie_ids.
+        """
+        return self.adjacency(person_ids, self.person_movies,
+                              "SELECT person_id, movie_id FROM stars WHERE person_id IN ({})")
+
+    def stars_for_movies(self, movie_ids):
+        """
+        Returns a dictionary mapping each movie_id to a tuple of its stars.
+        """
+        return self.adjacency(movie_ids, self.movie_stars,
+                              "SELECT movie_id, person_id FROM stars WHERE movie_id IN ({})")
+
+    def movies_for_person(self, person_id):
+        return self.movies_for_people([person_id])[person_id]
+
+    def stars_for_movie(self, movie_id):
+        return self.stars_for_movies([movie_id])[movie_id]
+
+    def adjacency(self, ids, cache, sql):
+        """
+        Returns the adjacency lists of the given ids, reading the ones
+        that are not cached with batched queries.
+        """
+        found = {}
+        missing = []
+        with self.lock:
+            for id in ids:
+                if id in cache:
+                    cache.move_to_end(id)
+                    found[id] = cache[id]
+                else:
+                    missing.append(id)
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start:start + BATCH_SIZE]
+            lists = {id: [] for id in batch}
+            placeholders = ",".join("?" * len(batch))
+            for id, other in self.query(sql.format(placeholders), batch):
+                lists[id].append(other)
+            with self.lock:
+                for id, values in lists.items():
+                    found[id] = cache[id] = tuple(values)
+                while len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+
+        return found
+
+    def resolve(self, name, birth=None):
+        """
+        Returns a single person_id for a name without asking the user:
+        the one born in `birth` if given, then the one in the most movies.
+        """
+        person_ids = self.ids_for_name(name)
+        if birth is not None:
+            person_ids = [person_id for person_id in person_ids
+                          if self.person(person_id)[1] == str(birth)]
+        if not person_ids:
+            return None
+        movies = self.movies_for_people(person_ids)
+        return max(sorted(person_ids), key=lambda person_id: len(movies[person_id]))
+
+    def shortest_path(self, source, target):
+        """
+        Breadth first search that reads the adjacency lists of a whole
+        level with a few batched queries.
+
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+        """
+        if source == target:
+            return []
+        parents = {source: None}
+        expanded = set()
+        frontier = [source]
+        while frontier:
+            person_movies = self.movies_for_people(frontier)
+            movie_ids = {movie_id for movies in person_movies.values()
+                         for movie_id in movies if movie_id not in expanded}
+            movie_stars = self.stars_for_movies(list(movie_ids))
+
+            next_frontier = []
+            for current in frontier:
+                for movie_id in person_movies[current]:
+                    if movie_id in expanded:
+                        continue
+                    expanded.add(movie_id)
+                    for person_id in movie_stars[movie_id]:
+                        if person_id in parents:
+                            continue
+                        parents[person_id] = (movie_id, current)
+                        if person_id == target:
+                            return path_from_tree(parents, target)
+                        next_frontier.append(person_id)
+            frontier = next_frontier
+
+        return None
+
+    def close(self):
+        self.connection.close()
+
+
+def read_signature(path):
+    """
+    Returns the source signature stored in a database, or None.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        connection = sqlite3.connect(path)
+        try:
+            rows = connection.execute(
+                "SELECT value FROM meta WHERE key = 'signature'").fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return rows[0][0] if rows else None
+
+
+def build_database(directory, path, signature, report=None):
+    """
+    Imports the CSV files of a directory into a new SQLite database,
+    counting skipped stars rows in the optional `IngestReport`.
+    """
+    temporary = f"{path}.tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    connection = sqlite3.connect(temporary)
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT OR IGNORE INTO people VALUES (?, ?, ?, ?)",
+            ((person_id, name, name.lower(), birth)
+             for person_id, name, birth in read_people(directory, report)))
+        connection.executemany(
+            "INSERT OR IGNORE INTO movies VALUES (?, ?, ?)",
+            read_movies(directory, report))
+
+        # Stars rows must refer to a known person and movie
+        connection.execute("CREATE TEMP TABLE raw_stars (person_id TEXT, movie_id TEXT)")
+        connection.executemany("INSERT INTO raw_stars VALUES (?, ?)",
+                               read_stars(directory, report))
+        if report is not None:
+            report.unknown_people += connection.execute(
+                "SELECT COUNT(*) FROM raw_stars "
+                "WHERE person_id NOT IN (SELECT id FROM people)").fetchone()[0]
+            report.unknown_movies += connection.execute(
+                "SELECT COUNT(*) FROM raw_stars "
+                "WHERE person_id IN (SELECT id FROM people) "
+                "AND movie_id NOT IN (SELECT id FROM movies)").fetchone()[0]
+        connection.execute(
+            "INSERT OR IGNORE INTO stars SELECT person_id, movie_id FROM raw_stars "
+            "WHERE person_id IN (SELECT id FROM people) "
+            "AND movie_id IN (SELECT id FROM movies)")
+        connection.execute("DROP TABLE raw_stars")
+        connection.executescript(INDEXES)
+        connection.execute("INSERT INTO meta VALUES ('signature', ?)", (signature,))
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temporary, path)
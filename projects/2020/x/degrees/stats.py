@@ -0,0 +1,158 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import degrees
+
+
+def distances_from(source):
+    """
+    Returns a dictionary mapping every person reachable from the source
+    to their degrees of separation from it.
+    """
+    distance = {source: 0}
+    frontier = [source]
+    level = 0
+    while frontier:
+        level += 1
+        next_frontier = []
+        for current in frontier:
+            for movie_id in degrees.movies_for_person(current):
+                for person_id in degrees.stars_for_movie(movie_id):
+                    if person_id not in distance:
+                        distance[person_id] = level
+                        next_frontier.append(person_id)
+        frontier = next_frontier
+    return distance
+
+
+def distance_distribution(center):
+    """
+    Returns how many people are at each distance from the center (such as
+    Bacon numbers for Kevin Bacon), and how many cannot be reached at all.
+    """
+    distance = distances_from(center)
+    histogram = [0] * (max(distance.values()) + 1)
+    for d in distance.values():
+        histogram[d] += 1
+    unreachable = len(degrees.all_person_ids()) - len(distance)
+    return histogram, unreachable
+
+
+def connected_components():
+    """
+    Returns the sizes of the connected components of the graph,
+    largest first.
+    """
+    seen = set()
+    sizes = []
+    for person_id in degrees.all_person_ids():
+        if person_id in seen:
+            continue
+        component = distances_from(person_id)
+        seen.update(component)
+        sizes.append(len(component))
+    sizes.sort(reverse=True)
+    return sizes
+
+
+def sweep(source):
+    """
+    Runs a double sweep from the source: a breadth first search, then a
+    second one from the farthest person found.
+
+    Returns the sum and count of the distances from the source, and the
+    eccentricity of the farthest person, which bounds the diameter from below.
+    """
+    distance = distances_from(source)
+    total = sum(distance.values())
+    farthest = max(distance, key=distance.get)
+    eccentricity = max(distances_from(farthest).values())
+    return total, len(distance) - 1, eccentricity
+
+
+def sample_paths(samples, processes=None, seed=0, progress=sys.stderr):
+    """
+    Estimates the average path length and the diameter of the graph from
+    double sweeps started at `samples` random people, spread over a pool of
+    worker processes, printing progress and throughput as it goes.
+    """
+    person_ids = degrees.all_person_ids()
+    sources = random.Random(seed).sample(person_ids, min(samples, len(person_ids)))
+
+    total = 0
+    pairs = 0
+    diameter = 0
+    start = time.perf_counter()
+
+    # Worker processes are forked, so they inherit the loaded dataset
+    with multiprocessing.Pool(processes) as pool:
+        for done, (distance_sum, reached, eccentricity) in enumerate(
+                pool.imap_unordered(sweep, sources), 1):
+            total += distance_sum
+            pairs += reached
+            diameter = max(diameter, eccentricity)
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                print(f"\r{done}/{len(sources)} sweeps, "
+                      f"{2 * done / elapsed:.1f} BFS/s", end="", file=progress)
+    if progress is not None:
+        print(file=progress)
+
+    return {
+        "samples": len(sources),
+        "average_path_length": total / pairs if pairs else None,
+        "diameter_lower_bound": diameter,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute separation statistics for a degrees dataset.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--center", default="Kevin Bacon",
+                        help="name or person_id to measure distances from")
+    parser.add_argument("--samples", type=int, default=32)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--output", default="stats.json")
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    degrees.load_data(args.directory, args.compact)
+    print(f"Data loaded in {time.perf_counter() - start:.1f}s.", file=sys.stderr)
+
+    center = args.center
+    if not degrees.is_person(center):
+        center = degrees.person_id_for_name(center, interactive=False)
+        if center is None:
+            sys.exit("Person not found.")
+
+    start = time.perf_counter()
+    histogram, unreachable = distance_distribution(center)
+    print(f"Distances from {center} in {time.perf_counter() - start:.1f}s.", file=sys.stderr)
+
+    start = time.perf_counter()
+    components = connected_components()
+    print(f"{len(components)} components in {time.perf_counter() - start:.1f}s.",
+          file=sys.stderr)
+
+    results = {
+        "center": center,
+        "distance_histogram": histogram,
+        "unreachable": unreachable,
+        "components": len(components),
+        "largest_components": components[:10],
+    }
+    results.update(sample_paths(args.samples, args.processes))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, separators=(",", ":"))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
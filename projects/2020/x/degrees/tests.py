@@ -0,0 +1,553 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+import batch
+import benchmark
+import cache
+import degrees
+import generate
+import ingest
+import landmarks
+import nameindex
+import paths
+import server
+import snapshot
+import stats
+import updates
+from util import Node, IndexedStackFrontier, IndexedQueueFrontier
+
+
+class MyTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        degrees.load_data("small")
+
+    def test_indexed_frontiers(self):
+        frontier = IndexedQueueFrontier()
+        frontier.add(Node("1", None, None))
+        frontier.add(Node("2", "10", None))
+        self.assertTrue(frontier.contains_state("2"))
+        self.assertEqual(frontier.remove().person_id, "1")
+        self.assertFalse(frontier.contains_state("1"))
+        self.assertEqual(frontier.remove().person_id, "2")
+        self.assertTrue(frontier.empty())
+
+        frontier = IndexedStackFrontier()
+        frontier.add(Node("1", None, None))
+        frontier.add(Node("2", "10", None))
+        self.assertEqual(frontier.remove().person_id, "2")
+
+        # A state added twice stays in the frontier until both are removed
+        for frontier in (IndexedQueueFrontier(), IndexedStackFrontier()):
+            frontier.add(Node("1", None, None))
+            frontier.add(Node("1", "10", None))
+            frontier.remove()
+            self.assertTrue(frontier.contains_state("1"))
+            self.assertFalse(frontier.empty())
+            frontier.remove()
+            self.assertFalse(frontier.contains_state("1"))
+            self.assertTrue(frontier.empty())
+
+    def test_shortest_path(self):
+        # Kevin Bacon and Tom Hanks starred in Apollo 13
+        self.assertEqual(degrees.shortest_path("102", "158"),
+                         [("112384", "158")])
+
+        path = degrees.shortest_path("102", "1597")
+        self.assertEqual(len(path), 3)
+        self.assertEqual(path[-1][1], "1597")
+
+        # Emma Watson is not connected to anyone in the small dataset
+        self.assertIsNone(degrees.shortest_path("102", "914612"))
+
+    def test_bidirectional_path(self):
+        for source in degrees.people:
+            for target in degrees.people:
+                expected = degrees.shortest_path(source, target)
+                path = degrees.shortest_path(source, target, "bidirectional",
+                                             use_cache=False)
+                if source == target:
+                    self.assertEqual(path, [])
+                elif expected is None:
+                    self.assertIsNone(path)
+                else:
+                    self.assertEqual(len(path), len(expected))
+                    self.assertEqual(path[-1][1], target)
+                    self.assertIn((path[0][0], path[0][1]),
+                                  degrees.neighbors_for_person(source))
+                    for (_, a), (movie_id, b) in zip(path, path[1:]):
+                        self.assertIn((movie_id, b),
+                                      degrees.neighbors_for_person(a))
+
+        with self.assertRaises(ValueError):
+            degrees.shortest_path("102", "158", "dfs")
+
+    def test_compact_graph(self):
+        expected = {source: {target: degrees.shortest_path(source, target)
+                             for target in degrees.people}
+                    for source in degrees.people}
+        neighbors = {person_id: degrees.neighbors_for_person(person_id)
+                     for person_id in degrees.people}
+
+        degrees.load_data("small", compact=True)
+        try:
+            self.assertEqual(degrees.people, {})
+            self.assertEqual(degrees.person_name("102"), "Kevin Bacon")
+            self.assertEqual(degrees.movie_title("112384"), "Apollo 13")
+            self.assertEqual(degrees.person_id_for_name("kevin bacon"), "102")
+            for source in expected:
+                self.assertEqual(degrees.neighbors_for_person(source),
+                                 neighbors[source])
+                for target, path in expected[source].items():
+                    compact_path = degrees.shortest_path(source, target, use_cache=False)
+                    bidirectional_path = degrees.shortest_path(source, target, "bidirectional",
+                                                               use_cache=False)
+                    if path is None:
+                        self.assertIsNone(compact_path)
+                        self.assertIsNone(bidirectional_path)
+                    else:
+                        self.assertEqual(len(compact_path), len(path))
+                        self.assertEqual(len(bidirectional_path), len(path))
+                        for (_, a), (movie_id, b) in zip([(None, source)] + bidirectional_path,
+                                                         bidirectional_path):
+                            self.assertIn((movie_id, b), neighbors[a])
+        finally:
+            degrees.load_data("small")
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in snapshot.SOURCE_FILES:
+                shutil.copy(os.path.join("small", name), directory)
+
+            built = snapshot.load_graph(directory)
+            self.assertTrue(os.path.exists(os.path.join(directory, snapshot.SNAPSHOT_FILE)))
+            mapped = snapshot.load_graph(directory)
+            self.assertIsInstance(mapped.names, snapshot.StringTable)
+            self.assertIsInstance(mapped.names.blob, memoryview)
+            self.assertEqual(list(mapped.names), list(built.names))
+            self.assertEqual(list(mapped.movie_stars), list(built.movie_stars))
+            self.assertEqual(mapped.shortest_path("102", "1597"),
+                             built.shortest_path("102", "1597"))
+
+            # A damaged or truncated snapshot is rebuilt
+            path = os.path.join(directory, snapshot.SNAPSHOT_FILE)
+            with open(path, "rb") as f:
+                data = f.read()
+            damaged = data[:snapshot.PREAMBLE.size] + b"#" + data[snapshot.PREAMBLE.size + 1:]
+            for contents in (damaged, data[:-300], data[:len(data) // 2], data[:10]):
+                with open(path, "wb") as f:
+                    f.write(contents)
+                self.assertIsNone(snapshot.read_snapshot(path, snapshot.source_signature(directory)))
+                self.assertEqual(list(snapshot.load_graph(directory).names), list(built.names))
+
+            # Changing a source file invalidates the snapshot
+            with open(os.path.join(directory, "people.csv"), "a", encoding="utf-8") as f:
+                f.write('1,"New Person",2000\n')
+            rebuilt = snapshot.load_graph(directory)
+            self.assertIsInstance(rebuilt.names.blob, bytearray)
+            self.assertEqual(snapshot.load_graph(directory).names[-1], "New Person")
+
+    def test_ingest_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in snapshot.SOURCE_FILES:
+                shutil.copy(os.path.join("small", name), directory)
+            with open(os.path.join(directory, "stars.csv"), "a", encoding="utf-8") as f:
+                f.write("1,104257\n102,1\n102,2\n158,95953,\n")
+            with open(os.path.join(directory, "people.csv"), "a", encoding="utf-8") as f:
+                f.write("\n\n")
+
+            for compact in (False, True):
+                report = degrees.load_data(directory, compact)
+                self.assertEqual(report.people, 16)
+                self.assertEqual(report.unknown_people, 1)
+                self.assertEqual(report.unknown_movies, 2)
+                self.assertEqual(degrees.person_id_for_name("Kevin Bacon"), "102")
+                # The row with a trailing comma is read like any other
+                self.assertIn("95953", degrees.movies_for_person("158"))
+
+            # Short rows are reported with their line, whatever the column order
+            path = os.path.join(directory, "reordered.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("movie_id,person_id\n104257,102\n\n112384\n")
+            rows = ingest.read_rows(path, ("person_id", "movie_id"))
+            self.assertEqual(next(rows), ("102", "104257"))
+            with self.assertRaisesRegex(ValueError, "line 4: expected 2 fields, got 1"):
+                next(rows)
+        degrees.load_data("small")
+
+    def test_batch_shortest_paths(self):
+        pairs = [(source, target) for source in degrees.people for target in degrees.people]
+        expected = [degrees.shortest_path(source, target) for source, target in pairs]
+        for processes in (None, 2):
+            paths = batch.batch_shortest_paths(pairs, processes)
+            self.assertEqual([path and len(path) for path in paths],
+                             [path and len(path) for path in expected])
+            for (source, target), path in zip(pairs, paths):
+                if path:
+                    self.assertEqual(path[-1][1], target)
+
+    def test_path_cache(self):
+        path_cache = cache.PathCache(maxsize=2)
+        path_cache.set_version("small")
+        path = degrees.shortest_path("102", "1597", use_cache=False)
+        path_cache.put("102", "1597", path)
+        self.assertEqual(path_cache.get("102", "1597"), path)
+
+        # The reverse path is served from the same entry
+        reverse = path_cache.get("1597", "102")
+        self.assertEqual(len(reverse), len(path))
+        self.assertEqual(reverse[-1][1], "102")
+        self.assertEqual(cache.reverse_path("1597", reverse), path)
+
+        path_cache.put("102", "914612", None)
+        self.assertIsNone(path_cache.get("914612", "102"))
+        path_cache.put("102", "158", [("112384", "158")])
+        self.assertIs(path_cache.get("102", "1597"), cache.MISSING)
+        self.assertEqual(path_cache.info(), cache.CacheInfo(3, 1, 2, 2))
+
+        path_cache.set_version("large")
+        self.assertIs(path_cache.get("102", "158"), cache.MISSING)
+
+        # shortest_path fills the module cache and invalidates it on reload
+        degrees.load_data("small")
+        hits = degrees.path_cache.hits
+        first = degrees.shortest_path("102", "1597")
+        self.assertEqual(degrees.shortest_path("102", "1597"), first)
+        self.assertEqual(degrees.path_cache.hits, hits + 1)
+
+    def test_landmarks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in snapshot.SOURCE_FILES:
+                shutil.copy(os.path.join("small", name), directory)
+            index = landmarks.load_or_build(directory, k=3)
+            self.assertTrue(os.path.exists(os.path.join(directory, landmarks.INDEX_FILE)))
+            loaded = landmarks.LandmarkIndex.load(os.path.join(directory, landmarks.INDEX_FILE))
+            self.assertEqual(loaded.landmarks, index.landmarks)
+            self.assertEqual(loaded.distances, index.distances)
+
+            # A damaged or truncated index is rebuilt
+            path = os.path.join(directory, landmarks.INDEX_FILE)
+            with open(path, "rb") as f:
+                data = f.read()
+            damaged = [data[:size] for size in range(0, len(data), 7)]
+            damaged.append(data[:landmarks.PREAMBLE.size] + b"#" + data[landmarks.PREAMBLE.size + 1:])
+            for contents in damaged:
+                with open(path, "wb") as f:
+                    f.write(contents)
+                self.assertIsNone(landmarks.LandmarkIndex.load(path))
+                rebuilt = landmarks.load_or_build(directory, k=3)
+                self.assertEqual(rebuilt.distances, index.distances)
+                self.assertEqual(landmarks.LandmarkIndex.load(path).distances, index.distances)
+
+        degrees.load_data("small")
+        degrees.landmark_index = index
+        try:
+            for source in degrees.people:
+                for target in degrees.people:
+                    path = degrees.shortest_path(source, target, use_cache=False)
+                    astar = degrees.shortest_path(source, target, "astar", use_cache=False)
+                    lower, upper = index.bounds(source, target)
+                    if path is None:
+                        self.assertIsNone(astar)
+                    else:
+                        self.assertEqual(len(astar), len(path))
+                        self.assertLessEqual(lower, len(path))
+                        self.assertGreaterEqual(upper, len(path))
+        finally:
+            degrees.landmark_index = None
+
+        # A* finds shortest paths on a larger graph, where people are
+        # often reached again by shorter paths
+        with tempfile.TemporaryDirectory() as directory:
+            generate.generate(directory, people=3000, movies=2000, seed=0)
+            try:
+                degrees.load_data(directory)
+                index = landmarks.LandmarkIndex.build()
+                person_ids = sorted(degrees.all_person_ids())
+                for source, target in zip(person_ids[::37], person_ids[::-41]):
+                    path = degrees.breadth_first_path(source, target)
+                    astar = index.astar_path(source, target)
+                    if path is None:
+                        self.assertIsNone(astar)
+                    else:
+                        self.assertEqual(len(astar), len(path))
+            finally:
+                degrees.load_data("small")
+
+    def test_server_answer(self):
+        response = server.answer({"id": 1, "source": "Kevin Bacon", "target": "158"})
+        self.assertEqual(response, {"id": 1, "source": "102", "target": "158",
+                                    "degrees": 1, "path": [["112384", "158"]]})
+        self.assertIsNone(server.answer({"source": "102", "target": "914612"})["degrees"])
+        self.assertIn("error", server.answer({"source": "Nobody", "target": "102"}))
+        self.assertEqual(server.answer({"source": "102"})["error"], "Missing field: target")
+        self.assertIn("--landmarks", server.answer({"source": "102", "target": "158",
+                                                    "algorithm": "astar"})["error"])
+        degrees.landmark_index = landmarks.LandmarkIndex.build(k=2)
+        try:
+            response = server.answer({"source": "102", "target": "158", "algorithm": "astar"})
+            self.assertEqual(response["degrees"], 1)
+        finally:
+            degrees.landmark_index = None
+
+        # Errors inside a search are not mistaken for errors in the query
+        shortest_path = degrees.shortest_path
+        degrees.shortest_path = lambda *args: {}["broken"]
+        try:
+            with self.assertRaises(KeyError):
+                server.answer({"source": "102", "target": "158"})
+        finally:
+            degrees.shortest_path = shortest_path
+
+        responses = []
+
+        async def serve():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'{"id": 1, "source": "102", "target": "1597"}\n\nnot json\n')
+            reader.feed_eof()
+            await server.Server(None).serve_stream(reader, responses.append)
+
+        asyncio.run(serve())
+        responses = sorted((json.loads(line) for line in responses), key=lambda r: r["id"] or 0)
+        self.assertIn("error", responses[0])
+        self.assertEqual(responses[1]["degrees"], 3)
+
+    def test_name_index(self):
+        index = nameindex.NameIndex([("1", "Tom Hanks", "1956"),
+                                     ("2", "Tom Cruise", "1962"),
+                                     ("3", "Tom Hanks", "1970"),
+                                     ("4", "Emma Watson", "1990")])
+        self.assertEqual(index.exact("tom hanks"), ["1", "3"])
+        self.assertEqual(index.prefix("tom"), ["Tom Cruise", "Tom Hanks"])
+        self.assertEqual(index.prefix("x"), [])
+        self.assertEqual(index.fuzzy("Tom Hnaks")[0][1], "Tom Hanks")
+        self.assertEqual(index.resolve("Emma Wattson"), "4")
+        self.assertEqual(index.resolve("Tom Hanks", birth=1970), "3")
+        self.assertEqual(index.resolve("Tom Hanks", rank={"1": 5, "3": 2}.get), "1")
+        self.assertIsNone(index.resolve("Zzz"))
+
+        # On a large index, pruned matching finds the same names as scoring
+        # every name, in a fraction of the time
+        rng = random.Random(0)
+        syllables = [a + b for a in "bdfklmnprst" for b in "aeiou"]
+        names = {" ".join("".join(rng.choices(syllables, k=rng.randint(1, 3))).title()
+                          for _ in range(2)) for _ in range(50000)}
+        index = nameindex.NameIndex((str(i), name, "") for i, name in enumerate(sorted(names)))
+        queries = [name[1:] + "e" for name in rng.sample(sorted(names), 10)]
+        start = time.perf_counter()
+        matches = [index.fuzzy(query) for query in queries]
+        pruned = time.perf_counter() - start
+        start = time.perf_counter()
+        for query, found in zip(queries, matches):
+            query = nameindex.trigrams(query.lower())
+            scored = []
+            for key in index.keys:
+                other = nameindex.trigrams(key)
+                score = len(query & other) / len(query | other)
+                if score >= 0.3:
+                    scored.append((-score, index.display[key]))
+            self.assertEqual([(-score, name) for score, name in sorted(scored)[:5]], found)
+        self.assertLess(pruned, (time.perf_counter() - start) / 2)
+
+        self.assertEqual(degrees.person_id_for_name("Kevin Bacn", interactive=False), "102")
+        self.assertEqual(degrees.get_name_index().prefix("Tom"),
+                         ["Tom Cruise", "Tom Hanks"])
+
+    def test_write_path(self):
+        node = Node("1", None, None)
+        for i in range(2, 6):
+            node = Node(str(i), f"m{i}", node)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(degrees.write_path(node),
+                         [("m2", "2"), ("m3", "3"), ("m4", "4"), ("m5", "5")])
+
+    def test_all_shortest_paths(self):
+        # Kevin Bacon reaches Mandy Patinkin through both Tom Hanks and Gary Sinise
+        found = list(paths.all_shortest_paths("102", "1597"))
+        self.assertEqual(len(found), len(set(map(tuple, found))))
+        self.assertGreater(len(found), 1)
+        for path in found:
+            self.assertEqual(len(path), 3)
+            self.assertEqual(path[-1][1], "1597")
+
+        self.assertEqual(paths.k_shortest_paths("102", "1597", 1), found[:1])
+        oldest = paths.k_shortest_paths("102", "1597", 1, key=paths.newest_movie_year)[0]
+        self.assertEqual(paths.newest_movie_year(oldest),
+                         min(map(paths.newest_movie_year, found)))
+
+        self.assertEqual(list(paths.all_shortest_paths("102", "102")), [[]])
+        self.assertEqual(list(paths.all_shortest_paths("102", "914612")), [])
+
+    def test_stats(self):
+        histogram, unreachable = stats.distance_distribution("102")
+        self.assertEqual(histogram, [1, 6, 5, 3])
+        self.assertEqual(unreachable, 1)
+        self.assertEqual(stats.connected_components(), [15, 1])
+
+        results = stats.sample_paths(4, processes=2, progress=None)
+        self.assertEqual(results["samples"], 4)
+        self.assertGreaterEqual(results["diameter_lower_bound"], 3)
+        self.assertGreater(results["average_path_length"], 1)
+
+    def test_incremental_updates(self):
+        try:
+            degrees.shortest_path("102", "914612")
+            index = degrees.get_name_index()
+
+            with tempfile.TemporaryDirectory() as directory:
+                delta = os.path.join(directory, "delta.csv")
+                with open(delta, "w", encoding="utf-8") as f:
+                    f.write("action,person_id,movie_id,name,year\n"
+                            "add_movie,,1,New Movie,2024\n"
+                            "add_star,102,1,,\n"
+                            "add_star,914612,1,,\n"
+                            "add_star,999,1,,\n")
+                report = updates.apply_delta(delta)
+                self.assertEqual((report.movies, report.stars, report.unknown_people),
+                                 (1, 2, 1))
+                self.assertEqual(degrees.shortest_path("102", "914612"),
+                                 [("1", "914612")])
+                degrees.shortest_path("102", "1597")
+                degrees.shortest_path("102", "158")
+
+                # Appended rows are applied on the next call, earlier ones are not
+                with open(delta, "a", encoding="utf-8") as f:
+                    f.write("add_person,2,,Kevin Bacon,1990\n"
+                            "add_person,2,,Kevin Bacon,1990\n"
+                            "rename_person,2,,Kevin,\n"
+                            "remove_person,1597,,,\n")
+                report = updates.apply_delta(delta)
+                self.assertEqual((report.people, report.movies, report.stars), (2, 0, 0))
+                self.assertEqual((report.invalid, report.skipped), (2, 2))
+
+                # Invalid rows are skipped once, not retried
+                with open(delta, "a", encoding="utf-8") as f:
+                    f.write("add_movie,,2,Other Movie,2025\n")
+                report = updates.apply_delta(delta)
+                self.assertEqual((report.movies, report.invalid), (1, 0))
+
+            self.assertEqual(index.exact("kevin bacon"), ["102", "2"])
+            self.assertEqual(degrees.person_ids_for_name("mandy patinkin"), [])
+            self.assertEqual(index.prefix("Mandy"), [])
+            self.assertEqual(degrees.path_cache.get("102", "158"), [("112384", "158")])
+            self.assertIs(degrees.path_cache.get("102", "1597"), cache.MISSING)
+
+            updates.remove_star("158", "112384")
+            self.assertIs(degrees.path_cache.get("102", "158"), cache.MISSING)
+            self.assertEqual(len(degrees.shortest_path("102", "158")), 2)
+        finally:
+            degrees.load_data("small")
+        self.assertIs(degrees.path_cache.get("102", "914612"), cache.MISSING)
+
+        degrees.load_data("small", compact=True)
+        try:
+            with self.assertRaises(ValueError):
+                updates.add_person("1", "Nobody", "2000")
+        finally:
+            degrees.load_data("small")
+
+    def test_constrained_path(self):
+        landmark_index = landmarks.LandmarkIndex.build(k=2)
+        for algorithm in ("bfs", "bidirectional", "astar"):
+            degrees.landmark_index = landmark_index if algorithm == "astar" else None
+            try:
+                # Without Apollo 13, Kevin Bacon cannot reach Tom Hanks
+                path = degrees.shortest_path("102", "158", algorithm,
+                                             movie_filter=degrees.excluding({"112384"}))
+                self.assertIsNone(path)
+
+                path = degrees.shortest_path("102", "1597", algorithm,
+                                             movie_filter=degrees.released_between(1990))
+                self.assertIsNone(path)
+                path = degrees.shortest_path("102", "1597", algorithm,
+                                             movie_filter=degrees.released_between(1980, 2000))
+                self.assertEqual(len(path), 3)
+
+                # Avoiding Robin Wright leaves no way to the Princess Bride cast
+                path = degrees.shortest_path("102", "1597", algorithm,
+                                             person_filter=degrees.excluding({"705"}))
+                self.assertIsNone(path)
+                path = degrees.shortest_path("102", "1597", algorithm,
+                                             person_filter=degrees.excluding({"158"}))
+                self.assertEqual([person_id for (_, person_id) in path], ["641", "705", "1597"])
+
+                self.assertIsNone(degrees.shortest_path("102", "1597", algorithm, max_depth=2))
+                self.assertEqual(len(degrees.shortest_path("102", "1597", algorithm,
+                                                           max_depth=3)), 3)
+                self.assertIsNone(degrees.shortest_path("102", "1597", algorithm,
+                                                        use_cache=False, max_depth=2))
+            finally:
+                degrees.landmark_index = None
+
+        self.assertEqual(degrees.neighbors_for_person("102", degrees.excluding({"112384"})),
+                         {("104257", person_id) for person_id in ("102", "129", "193", "197")})
+
+    def test_sqlite_store(self):
+        expected = {(source, target): degrees.shortest_path(source, target)
+                    for source in degrees.people for target in degrees.people}
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in snapshot.SOURCE_FILES:
+                shutil.copy(os.path.join("small", name), directory)
+            with open(os.path.join(directory, "stars.csv"), "a", encoding="utf-8") as f:
+                f.write("1,104257\n102,1\n")
+
+            report = degrees.load_data(directory, use_sqlite=True)
+            try:
+                self.assertEqual((report.unknown_people, report.unknown_movies), (1, 1))
+                self.assertEqual(degrees.people, {})
+                self.assertEqual(degrees.person_name("102"), "Kevin Bacon")
+                self.assertEqual(degrees.movie_title("112384"), "Apollo 13")
+                self.assertEqual(degrees.person_id_for_name("kevin bacon"), "102")
+                self.assertEqual(degrees.person_id_for_name("Kevin Bacon", False), "102")
+                self.assertEqual(sorted(degrees.stars_for_movie("112384")),
+                                 ["102", "158", "200", "641"])
+                with self.assertRaises(KeyError):
+                    degrees.person_name("1")
+                for (source, target), path in expected.items():
+                    sqlite_path = degrees.shortest_path(source, target, use_cache=False)
+                    if path is None:
+                        self.assertIsNone(sqlite_path)
+                    else:
+                        self.assertEqual(len(sqlite_path), len(path))
+
+                # A second load reuses the database
+                self.assertEqual(degrees.load_data(directory, use_sqlite=True).stars, 0)
+            finally:
+                degrees.load_data("small")
+
+    def test_generate_and_benchmark(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generate.generate(directory, people=300, movies=200, seed=1)
+            try:
+                report = degrees.load_data(directory)
+                self.assertEqual((report.people, report.movies, report.skipped), (300, 200, 0))
+                counts = sorted(map(degrees.movie_count, degrees.all_person_ids()))
+                self.assertGreater(counts[-1], 4 * counts[len(counts) // 2])
+
+                results = benchmark.benchmark_search(directory, queries=20,
+                                                     strategies=["bfs", "bidirectional", "compact",
+                                                                 "compact-bidirectional"])
+                strategies = results["strategies"]
+                self.assertEqual(len({result["connected"] for result in strategies.values()}), 1)
+                self.assertIsNone(strategies["compact"]["nodes_expanded"])
+                self.assertIsNone(strategies["compact-bidirectional"]["nodes_expanded"])
+                self.assertLess(strategies["bidirectional"]["nodes_expanded"],
+                                strategies["bfs"]["nodes_expanded"])
+                latency = strategies["bfs"]["latency_ms"]
+                self.assertLessEqual(latency["p50"], latency["p99"])
+                json.dumps(results)
+            finally:
+                degrees.load_data("small")
+        self.assertIs(degrees.movies_for_person.__name__, "movies_for_person")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import degrees
+from ingest import IngestReport, read_rows
+
+# Columns of a delta file: one change per row, for example
+#   add_person,1234,,Jane Doe,1980
+#   add_movie,,5678,New Movie,2024
+#   add_star,1234,5678,,
+DELTA_COLUMNS = ("action", "person_id", "movie_id", "name", "year")
+
+ACTIONS = ("add_person", "remove_person", "add_movie", "remove_movie",
+           "add_star", "remove_star")
+
+
+def check_updatable():
+    """
+    Updates apply to the `people`, `movies` and `names` dictionaries only.
+    The compact graph, its snapshot and the SQLite store mirror the CSV
+    files unchanged.
+    """
+    if degrees.graph is not None or degrees.store is not None:
+        raise ValueError("Incremental updates need the dictionary representation; "
+                         "load the data without compact or use_sqlite")
+
+
+def mark_updated():
+    """
+    Makes the next load_data empty the path cache even if it reloads the
+    same CSV files, since the loaded data no longer matches them.
+    """
+    degrees.path_cache.version = None
+
+
+def add_person(person_id, name, birth):
+    """
+    Adds a person who starred in no movies yet.
+    """
+    check_updatable()
+    if person_id in degrees.people:
+        raise ValueError(f"Duplicate person_id: {person_id}")
+    degrees.people[person_id] = {"name": name, "birth": birth, "movies": set()}
+    degrees.names.setdefault(name.lower(), set()).add(person_id)
+    if degrees.name_index is not None:
+        degrees.name_index.add(person_id, name, birth)
+    mark_updated()
+
+
+def remove_person(person_id):
+    """
+    Removes a person and all of their stars entries.
+    """
+    check_updatable()
+    person = degrees.people.pop(person_id)
+    for movie_id in person["movies"]:
+        degrees.movies[movie_id]["stars"].discard(person_id)
+
+    key = person["name"].lower()
+    degrees.names[key].discard(person_id)
+    if not degrees.names[key]:
+        del degrees.names[key]
+    if degrees.name_index is not None:
+        degrees.name_index.remove(person_id, person["name"])
+
+    # Only paths through the person change; nobody becomes connected
+    degrees.path_cache.invalidate(
+        lambda source, target, path: person_id in (source, target)
+        or (path is not None and any(step[1] == person_id for step in path)))
+    if person["movies"]:
+        degrees.landmark_index = None
+    mark_updated()
+
+
+def add_movie(movie_id, title, year):
+    """
+    Adds a movie without stars yet.
+    """
+    check_updatable()
+    if movie_id in degrees.movies:
+        raise ValueError(f"Duplicate movie_id: {movie_id}")
+    degrees.movies[movie_id] = {"title": title, "year": year, "stars": set()}
+    mark_updated()
+
+
+def remove_movie(movie_id):
+    """
+    Removes a movie and all of its stars entries.
+    """
+    check_updatable()
+    movie = degrees.movies.pop(movie_id)
+    for person_id in movie["stars"]:
+        degrees.people[person_id]["movies"].discard(movie_id)
+
+    degrees.path_cache.invalidate(
+        lambda source, target, path: path is not None
+        and any(step[0] == movie_id for step in path))
+    if movie["stars"]:
+        degrees.landmark_index = None
+    mark_updated()
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie.
+    """
+    check_updatable()
+    person = degrees.people[person_id]
+    movie = degrees.movies[movie_id]
+    if movie_id in person["movies"]:
+        return
+
+    if person["movies"]:
+        # The new connections may shorten any cached path
+        degrees.path_cache.clear()
+    else:
+        # A person's first movie makes them a leaf, which can only
+        # change the answers for pairs that involve them
+        degrees.path_cache.invalidate(
+            lambda source, target, path: person_id in (source, target))
+    person["movies"].add(movie_id)
+    movie["stars"].add(person_id)
+    degrees.landmark_index = None
+    mark_updated()
+
+
+def remove_star(person_id, movie_id):
+    """
+    Removes the record that a person starred in a movie.
+    """
+    check_updatable()
+    person = degrees.people[person_id]
+    movie = degrees.movies[movie_id]
+    if movie_id not in person["movies"]:
+        return
+
+    person["movies"].discard(movie_id)
+    movie["stars"].discard(person_id)
+
+    # Only paths that moved through this person by this movie change
+    def affected(source, target, path):
+        if path is None:
+            return False
+        people_on_path = {source} | {step[1] for step in path}
+        movies_on_path = {step[0] for step in path}
+        return person_id in people_on_path and movie_id in movies_on_path
+
+    degrees.path_cache.invalidate(affected)
+    degrees.landmark_index = None
+    mark_updated()
+
+
+def apply_delta(path):
+    """
+    Applies the rows of an append-only delta CSV file (see DELTA_COLUMNS)
+    that were not applied before, so it can be called again whenever rows
+    are appended to the file.
+
+    Returns an `IngestReport` counting the applied people, movies and stars
+    changes, and the skipped rows: those that refer to an unknown person or
+    movie, and invalid ones such as duplicate additions or unknown actions.
+    Skipped rows are not retried on later calls.
+    """
+    check_updatable()
+    report = IngestReport()
+    done = degrees.applied_deltas.get(path, 0)
+    rows = 0
+    try:
+        for action, person_id, movie_id, name, year in read_rows(path, DELTA_COLUMNS):
+            if rows < done:
+                rows += 1
+                continue
+            apply_change(action, person_id, movie_id, name, year, report)
+            rows += 1
+    finally:
+        degrees.applied_deltas[path] = rows
+    return report
+
+
+def apply_change(action, person_id, movie_id, name, year, report):
+    """
+    Applies one row of a delta file, counting it in the report.
+    """
+    if action not in ACTIONS:
+        report.invalid += 1
+        return
+    try:
+        if action == "add_person":
+            add_person(person_id, name, year)
+        elif action == "remove_person":
+            remove_person(person_id)
+        elif action == "add_movie":
+            add_movie(movie_id, name, year)
+        elif action == "remove_movie":
+            remove_movie(movie_id)
+        elif action == "add_star":
+            add_star(person_id, movie_id)
+        else:
+            remove_star(person_id, movie_id)
+    except ValueError:
+        report.invalid += 1
+        return
+    except KeyError:
+        if person_id and person_id not in degrees.people:
+            report.unknown_people += 1
+        else:
+            report.unknown_movies += 1
+        return
+
+    if action.endswith("_person"):
+        report.people += 1
+    elif action.endswith("_movie"):
+        report.movies += 1
+    else:
+        report.stars += 1
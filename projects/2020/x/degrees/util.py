@@ -1,5 +1,10 @@
+from collections import Counter, deque
+
+
 # Addapted by me
 class Node():
+    __slots__ = ("person_id", "movie", "parent")
+
     def __init__(self, person_id, movie, parent):
         self.person_id = person_id  # state
         self.movie = movie #action
@@ -36,4 +41,65 @@ class QueueFrontier(StackFrontier):
         else:
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
-            return node
\ No newline at end of file
+            return node
+
+
+class IndexedStackFrontier():
+    """
+    Stack frontier backed by a deque with a hash index counting the
+    nodes of each state it holds, so add, remove and contains_state are
+    all O(1), even when a state is added more than once.
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = Counter()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.person_id] += 1
+
+    def discard_state(self, person_id):
+        self.states[person_id] -= 1
+        if not self.states[person_id]:
+            del self.states[person_id]
+
+    def contains_state(self, person_id):
+        return person_id in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard_state(node.person_id)
+            return node
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard_state(node.person_id)
+            return node
+
+
+def path_from_tree(parents, target):
+    """
+    Returns the (movie_id, person_id) path from the root of a
+    breadth first tree to the target, or None if it was not reached.
+    """
+    if target not in parents:
+        return None
+    path = []
+    while parents[target] is not None:
+        movie_id, parent = parents[target]
+        path.append((movie_id, target))
+        target = parent
+    path.reverse()
+    return path
@@ -0,0 +1,326 @@
+"""
+Bitboard engine for Tic Tac Toe
+
+A board is a pair of 9-bit integers (x, o) holding the cells taken by
+each player, with cell (i, j) stored at bit 3 * i + j.
+"""
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# A Board counts the cells of a side in every line, packed 2 bits per
+# line in WIN_MASKS order: a move adds LINE_UNITS[cell], one in each line
+# through the cell, and a complete line has both of its bits set
+LINE_UNITS = tuple(sum(1 << 2 * line for line, mask in enumerate(WIN_MASKS) if mask >> cell & 1)
+                   for cell in range(9))
+LOW_BITS = 0x5555
+
+
+def complete(counts):
+    """
+    Returns True if packed line counts hold a line of 3.
+    """
+    return counts & counts >> 1 & LOW_BITS != 0
+
+# Weight of each cell in the base-3 index of a board
+POW3 = tuple(3 ** (8 - cell) for cell in range(9))
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn, since X moves first.
+    """
+    return x.bit_count() == o.bit_count()
+
+
+def has_line(bits):
+    """
+    Returns True if the cells in bits complete a row, column or diagonal.
+    """
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if has_line(x):
+        return 1
+    if has_line(o):
+        return -1
+    return 0
+
+
+def terminal(x, o):
+    return (x | o) == FULL or has_line(x) or has_line(o)
+
+
+def moves(x, o):
+    """
+    Returns the empty cells in order.
+    """
+    occupied = x | o
+    return [cell for cell in range(9) if not occupied >> cell & 1]
+
+
+def index(x, o):
+    """
+    Returns the base-3 index of a board, with 0 for an empty cell,
+    1 for X and 2 for O, the first cell being the most significant digit.
+    """
+    key = 0
+    for cell in range(9):
+        if x >> cell & 1:
+            key += POW3[cell]
+        elif o >> cell & 1:
+            key += 2 * POW3[cell]
+    return key
+
+
+# The 8 symmetries of the board (rotations and reflections) as
+# permutations: symmetry t moves the content of cell c to SYMMETRIES[t][c]
+SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identity
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # rotate 90 degrees
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # rotate 180 degrees
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # rotate 270 degrees
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # mirror columns
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # mirror rows
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # transpose
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),  # anti-transpose
+)
+
+# Symmetry that undoes each symmetry
+INVERSES = tuple(SYMMETRIES.index(tuple(permutation.index(cell) for cell in range(9)))
+                 for permutation in SYMMETRIES)
+
+
+def permute(bits, permutation):
+    moved = 0
+    for cell in range(9):
+        if bits >> cell & 1:
+            moved |= 1 << permutation[cell]
+    return moved
+
+
+# Every 9-bit set of cells under every symmetry
+TRANSFORMED = tuple(tuple(permute(bits, permutation) for bits in range(FULL + 1))
+                    for permutation in SYMMETRIES)
+
+
+def transform(bits, symmetry):
+    """
+    Returns a set of cells moved by one of the SYMMETRIES.
+    """
+    return TRANSFORMED[symmetry][bits]
+
+
+def canonical(x, o):
+    """
+    Returns the symmetric variant of a board with the smallest base-3
+    index, as (x, o, symmetry) with the symmetry that maps the board to it.
+    """
+    best = None
+    for symmetry, table in enumerate(TRANSFORMED):
+        variant = (index(table[x], table[o]), symmetry)
+        if best is None or variant < best:
+            best = variant
+    symmetry = best[1]
+    return TRANSFORMED[symmetry][x], TRANSFORMED[symmetry][o], symmetry
+
+
+class Board():
+    """
+    Mutable bitboards to search in place: play() makes a move and undo()
+    takes back the last one. Instead of copying the board, they update
+    the bitboards, the move count, the side to move and the number of
+    cells each side holds in every line. Sides are 0 for X and 1 for O.
+    """
+
+    def __init__(self, x=0, o=0):
+        self.bits = [x, o]
+        self.count = (x | o).bit_count()
+        self.side = 0 if x_to_move(x, o) else 1
+        self.lines = [sum((bits & mask).bit_count() << 2 * line for line, mask in enumerate(WIN_MASKS))
+                      for bits in (x, o)]
+        self.winner = 0 if complete(self.lines[0]) else 1 if complete(self.lines[1]) else None
+        self.history = []
+
+    @property
+    def x(self):
+        return self.bits[0]
+
+    @property
+    def o(self):
+        return self.bits[1]
+
+    def play(self, cell):
+        """
+        Makes a move on an empty cell for the side to move, without checks.
+        """
+        side = self.side
+        self.bits[side] |= 1 << cell
+        counts = self.lines[side] + LINE_UNITS[cell]
+        self.lines[side] = counts
+        if counts & counts >> 1 & LOW_BITS:
+            self.winner = side
+        self.history.append(cell)
+        self.count += 1
+        self.side = 1 - side
+
+    def undo(self):
+        """
+        Takes back the last move.
+        """
+        cell = self.history.pop()
+        side = 1 - self.side
+        self.bits[side] ^= 1 << cell
+        self.lines[side] -= LINE_UNITS[cell]
+        self.winner = None
+        self.count -= 1
+        self.side = side
+
+
+# Static move ordering: the center, then the corners, then the edges
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+RANK = tuple(ORDER.index(cell) for cell in range(9))
+
+
+class AlphaBeta():
+    """
+    Alpha-beta search, playing and taking back moves on one Board. Below
+    the root, moves are tried killer move first, then by history score,
+    then center, corners and edges. `nodes` counts the boards visited;
+    history scores carry over between searches.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.killers = [None] * 10
+        self.history = [0] * 9
+        self.orders = None
+
+    def order_moves(self):
+        """
+        Sorts the cells by history score once per search, with one order
+        for each possible killer move, so that no node has to sort.
+        """
+        history = self.history
+        order = tuple(sorted(ORDER, key=lambda cell: (-history[cell], RANK[cell])))
+        self.orders = {None: order}
+        for killer in order:
+            self.orders[killer] = (killer,) + tuple(cell for cell in order if cell != killer)
+
+    def best_move(self, x, o):
+        """
+        Returns the best cell for the side to move on a board that is not
+        terminal, and the utility of the board.
+
+        Like getMax and getMin, the first best cell in order is chosen and
+        the search stops as soon as a winning move is found.
+        """
+        self.nodes += 1
+        self.order_moves()
+        board = Board(x, o)
+        sign = 1 if board.side == 0 else -1
+        occupied = x | o
+        best = None
+        action = None
+
+        # Root moves are tried in order, and only a strictly better
+        # one replaces the first, so the same cell wins ties
+        for cell in range(9):
+            if occupied >> cell & 1:
+                continue
+            util = self.child_value(board, cell, 1, -1 if best is None else best, 1)
+            if best is None or util > best:
+                best = util
+                action = cell
+            if best == 1:
+                break
+
+        return action, sign * best
+
+    def optimal_moves(self, x, o):
+        """
+        Returns the set of all best cells for the side to move on a board
+        that is not terminal, as a 9-bit mask, and the utility of the board.
+        """
+        self.nodes += 1
+        self.order_moves()
+        board = Board(x, o)
+        occupied = x | o
+        best = -1
+        moves = 0
+        for cell in range(9):
+            if occupied >> cell & 1:
+                continue
+            # A result below the window only shows the cell is worse
+            util = self.child_value(board, cell, 1, best - 1 if moves else -2, 1)
+            if util > best or not moves:
+                best = util
+                moves = 1 << cell
+            elif util == best:
+                moves |= 1 << cell
+        return moves, best if board.side == 0 else -best
+
+    def value(self, board, alpha, beta, ply):
+        """
+        Returns the utility of a board that is not terminal for the side
+        to move (negamax): exact if it lies between alpha and beta, else
+        a bound beyond them.
+        """
+        self.nodes += 1
+        bits = board.bits
+        occupied = bits[0] | bits[1]
+        order = self.orders[self.killers[ply]]
+        best = -1
+        # Indexing rather than a for loop, which would allocate an iterator
+        index = 0
+        while index < 9:
+            cell = order[index]
+            index += 1
+            if occupied >> cell & 1:
+                continue
+            util = self.child_value(board, cell, ply + 1, alpha, beta)
+            if util > best:
+                best = util
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.killers[ply] = cell
+                self.history[cell] += 1 << (9 - ply)
+                break
+        return best
+
+    def child_value(self, board, cell, ply, alpha, beta):
+        """
+        Returns the utility for the side to move of playing a cell.
+        """
+        board.play(cell)
+        # Only the side that just moved can have completed a line
+        if board.winner is not None:
+            util = 1
+        elif board.count == 9:
+            util = 0
+        else:
+            util = -self.value(board, -beta, -alpha, ply)
+        board.undo()
+        return util
+
+
+def search(x, o):
+    """
+    Returns the best cell and the utility of a board that is not terminal,
+    see AlphaBeta.best_move.
+    """
+    return AlphaBeta().best_move(x, o)
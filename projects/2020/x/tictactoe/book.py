@@ -0,0 +1,95 @@
+"""
+Perfect-play opening book for Tic Tac Toe
+
+The book holds one byte for every base-3 board index (see bitboard.index):
+the best cell in the low 4 bits and the utility plus one above them, or
+UNREACHED for boards that cannot occur in a game or are already over.
+
+Build it with `python book.py`.
+"""
+import mmap
+import os
+import struct
+import sys
+
+import bitboard
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+
+MAGIC = b"TTTBOOK\0"
+VERSION = 1
+
+# Magic and format version
+PREAMBLE = struct.Struct("<8sI")
+
+ENTRIES = 3 ** 9
+UNREACHED = 0xFF
+
+
+def solve():
+    """
+    Returns the book entries of every board reachable from the empty board.
+    """
+    engine = bitboard.AlphaBeta()
+    entries = bytearray([UNREACHED]) * ENTRIES
+
+    stack = [(0, 0, 0)]
+    while stack:
+        x, o, key = stack.pop()
+        if entries[key] != UNREACHED or bitboard.terminal(x, o):
+            continue
+        cell, util = engine.best_move(x, o)
+        entries[key] = cell | (util + 1) << 4
+
+        maximizing = bitboard.x_to_move(x, o)
+        for cell in bitboard.moves(x, o):
+            if maximizing:
+                stack.append((x | 1 << cell, o, key + bitboard.POW3[cell]))
+            else:
+                stack.append((x, o | 1 << cell, key + 2 * bitboard.POW3[cell]))
+    return entries
+
+
+def build(path=BOOK_FILE):
+    """
+    Solves every reachable board and writes the book atomically.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION))
+        f.write(solve())
+    os.replace(temporary, path)
+
+
+def load(path=BOOK_FILE):
+    """
+    Memory-maps a book file and returns its entries,
+    or None if the book is missing or invalid.
+    """
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != PREAMBLE.size + ENTRIES:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+
+    magic, version = PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return memoryview(buffer)[PREAMBLE.size:]
+
+
+def lookup(entries, key):
+    """
+    Returns the best cell and the utility of the board with a base-3 index,
+    or None if the book has no entry for it.
+    """
+    entry = entries[key]
+    if entry == UNREACHED:
+        return None
+    return entry & 0x0F, (entry >> 4) - 1
+
+
+if __name__ == "__main__":
+    build(sys.argv[1] if len(sys.argv) > 1 else BOOK_FILE)
@@ -0,0 +1,269 @@
+"""
+m,n,k-game engine: Tic Tac Toe generalized to boards of any size
+where k in a row wins, such as 4x4 boards or Gomoku (15x15, k = 5).
+
+Boards are lists of rows holding X, O or EMPTY, like in tictactoe.py,
+which stays the engine for the standard 3x3 game.
+"""
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a won game; wins found sooner score higher, and heuristic
+# evaluations must stay well below it
+WIN = 1 << 20
+
+
+class Game():
+    """
+    The rules of an m,n,k-game: a board of `rows` by `columns`
+    where the first player with `k` in a row wins. X moves first.
+
+    Internally a board is a pair of bitboards (x, o) with cell (i, j)
+    at bit i * columns + j, and every possible line is a precomputed mask.
+    """
+
+    def __init__(self, rows=3, columns=3, k=3):
+        if not 0 < k <= max(rows, columns):
+            raise ValueError(f"No line of {k} fits on a {rows}x{columns} board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.cells = rows * columns
+        self.full = (1 << self.cells) - 1
+
+        lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        lines.append(sum(1 << (i + di * step) * columns + j + dj * step
+                                         for step in range(k)))
+        self.lines = tuple(lines)
+        self.cell_lines = tuple(tuple(line for line in lines if line >> cell & 1)
+                                for cell in range(self.cells))
+
+        # Cells on more lines first, then nearer the center:
+        # for 3x3, the center, the corners, then the edges
+        def rank(cell):
+            i, j = divmod(cell, columns)
+            return -len(self.cell_lines[cell]), abs(2 * i - rows + 1) + abs(2 * j - columns + 1)
+        self.order = tuple(sorted(range(self.cells), key=rank))
+
+    def initial_state(self):
+        return [[EMPTY] * self.columns for _ in range(self.rows)]
+
+    def to_bitboard(self, board):
+        x = 0
+        o = 0
+        for cell in range(self.cells):
+            value = board[cell // self.columns][cell % self.columns]
+            if value == X:
+                x |= 1 << cell
+            elif value == O:
+                o |= 1 << cell
+        return x, o
+
+    def wins(self, bits, cell):
+        """
+        Returns True if the cells in bits complete a line through a cell.
+        """
+        for line in self.cell_lines[cell]:
+            if bits & line == line:
+                return True
+        return False
+
+    def has_line(self, bits):
+        for line in self.lines:
+            if bits & line == line:
+                return True
+        return False
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board, or None if the game is over.
+        """
+        if self.terminal(board):
+            return None
+        x, o = self.to_bitboard(board)
+        return X if x.bit_count() == o.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns all possible actions (i, j) available on the board, or None if the game is over.
+        """
+        if self.terminal(board):
+            return None
+        return [(i, j) for i in range(self.rows) for j in range(self.columns)
+                if board[i][j] is EMPTY]
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        (i, j) = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns) or board[i][j] is not EMPTY:
+            raise NameError('Not a valid action for the given board')
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        x, o = self.to_bitboard(board)
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        x, o = self.to_bitboard(board)
+        return (x | o) == self.full or self.has_line(x) or self.has_line(o)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+
+def open_lines(game, x, o):
+    """
+    Default heuristic: every line still open to only one player scores
+    4 ** (stones in it) for that player. Returns the score for X.
+    """
+    score = 0
+    for line in game.lines:
+        mine = x & line
+        theirs = o & line
+        if mine and not theirs:
+            score += 4 ** mine.bit_count()
+        elif theirs and not mine:
+            score -= 4 ** theirs.bit_count()
+    return score
+
+
+class Timeout(Exception):
+    pass
+
+
+class Search():
+    """
+    Iterative deepening alpha-beta search of an m,n,k-game.
+
+    Each iteration searches one ply deeper, trying the best move of the
+    previous one first, until the whole game is searched or `time_limit`
+    seconds have passed. Boards at the depth limit are scored with
+    `heuristic(game, x, o)`, which returns the score for X. `max_depth`
+    caps the iterations, and must be at least 1 so that a move is found.
+    """
+
+    def __init__(self, game, heuristic=open_lines, time_limit=1.0, max_depth=None):
+        if max_depth is not None and max_depth < 1:
+            raise ValueError(f"max_depth must be at least 1, not {max_depth}")
+        self.game = game
+        self.heuristic = heuristic
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.depth = 0
+
+    def best_move(self, x, o):
+        """
+        Returns the best cell for the side to move on a board that is not
+        terminal, and its score for that side: WIN minus the number of
+        moves for a forced win, 0 for a draw if the whole game was
+        searched, and a heuristic score otherwise.
+        """
+        game = self.game
+        empty = game.cells - (x | o).bit_count()
+        max_depth = empty if self.max_depth is None else min(self.max_depth, empty)
+        self.deadline = time.perf_counter() + self.time_limit
+        self.killers = [None] * (empty + 1)
+        self.depth = 0
+
+        # The first iteration only scores the moves, so it always completes
+        moves = [cell for cell in game.order if not (x | o) >> cell & 1]
+        best = None
+        for depth in range(1, max_depth + 1):
+            try:
+                best = self.root(x, o, moves, depth)
+            except Timeout:
+                break
+            self.depth = depth
+            # Search the best move first in the next iteration
+            moves.remove(best[0])
+            moves.insert(0, best[0])
+            if abs(best[1]) >= WIN - game.cells:
+                break
+        return best
+
+    def root(self, x, o, moves, depth):
+        best = None
+        alpha = -WIN - 1
+        for cell in moves:
+            score = -self.child(x, o, cell, 1, depth - 1, -WIN - 1, -alpha)
+            if best is None or score > best[1]:
+                best = (cell, score)
+                alpha = score
+        return best
+
+    def child(self, x, o, cell, ply, depth, alpha, beta):
+        """
+        Returns the score of the board after playing a cell,
+        for the side to move on it.
+        """
+        maximizing = x.bit_count() == o.bit_count()
+        if maximizing:
+            x |= 1 << cell
+            mover = x
+        else:
+            o |= 1 << cell
+            mover = o
+        if self.game.wins(mover, cell):
+            return ply - WIN
+        if (x | o) == self.game.full:
+            return 0
+        if depth == 0:
+            # The heuristic scores for X, who is not to move if they just did
+            score = self.heuristic(self.game, x, o)
+            return -score if maximizing else score
+        return self.value(x, o, ply, depth, alpha, beta)
+
+    def value(self, x, o, ply, depth, alpha, beta):
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise Timeout
+
+        occupied = x | o
+        killer = self.killers[ply]
+        moves = [cell for cell in self.game.order if not occupied >> cell & 1]
+        if killer in moves:
+            moves.remove(killer)
+            moves.insert(0, killer)
+
+        best = -WIN - 1
+        for cell in moves:
+            score = -self.child(x, o, cell, ply + 1, depth - 1, -beta, -alpha)
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.killers[ply] = cell
+                break
+        return best
+
+
+def minimax(game, board, time_limit=1.0, heuristic=open_lines):
+    """
+    Returns the best action for the current player on the board found
+    within the time limit, or None if the game is over.
+    """
+    if game.terminal(board):
+        return None
+    x, o = game.to_bitboard(board)
+    cell, score = Search(game, heuristic, time_limit).best_move(x, o)
+    return divmod(cell, game.columns)
@@ -1,9 +1,29 @@
+import gc
+import os
+import tempfile
+import time
 import unittest
 
+import bitboard
+import book
+import mnk
+import tournament
+import tictactoe
 from tictactoe import initial_state, player, actions, result, winner, terminal, utility, minimax, getMin, getMax
 
 class MyTestCase(unittest.TestCase):
 
+    def without_book(self):
+        """
+        Makes minimax search instead of using the opening book until the test ends.
+        """
+        previous = (tictactoe.opening_book, tictactoe.book_loaded)
+        tictactoe.opening_book, tictactoe.book_loaded = None, True
+
+        def restore():
+            tictactoe.opening_book, tictactoe.book_loaded = previous
+        self.addCleanup(restore)
+
     def test_player(self):
         X = "X"
         O = "O"
@@ -184,6 +204,266 @@ class MyTestCase(unittest.TestCase):
         action, util = getMin(board)
         self.assertEqual(action, (0, 0))
 
+    def test_transposition_table(self):
+        X = "X"
+        O = "O"
+        EMPTY = None
+
+        board = [[EMPTY, X, O],
+                 [EMPTY, EMPTY, EMPTY],
+                 [EMPTY, EMPTY, EMPTY]]
+        self.assertEqual(tictactoe.board_key(initial_state()), 0)
+        self.assertEqual(tictactoe.board_key(board), 3 ** 7 + 2 * 3 ** 6)
+
+        self.without_book()
+        tictactoe.table.clear()
+        expected = getMax(board)
+        self.assertGreater(len(tictactoe.table), 0)
+        hits = tictactoe.table.hits
+        self.assertEqual(getMax(board), expected)
+        self.assertEqual(tictactoe.table.hits, hits + 1)
+
+        # A full table evicts positions but gives the same answers
+        previous = tictactoe.table
+        tictactoe.table = tictactoe.TranspositionTable(maxsize=1)
+        try:
+            self.assertEqual(minimax(initial_state()), (0, 0))
+            self.assertEqual(getMax(board), expected)
+            self.assertEqual(len(tictactoe.table), 1)
+            self.assertEqual(minimax(initial_state()), (0, 0))
+            self.assertEqual(tictactoe.table.hits, 0)
+        finally:
+            tictactoe.table = previous
+
+    def test_bitboard(self):
+        X = "X"
+        O = "O"
+        EMPTY = None
+
+        board = [[EMPTY, X, O],
+                 [X, O, EMPTY],
+                 [EMPTY, EMPTY, X]]
+        x, o = tictactoe.to_bitboard(board)
+        self.assertEqual((x, o), (0b100001010, 0b000010100))
+        self.assertEqual(tictactoe.from_bitboard(x, o), board)
+        self.assertTrue(bitboard.x_to_move(x, o) is False)
+        self.assertEqual(bitboard.moves(x, o), [0, 5, 6, 7])
+        self.assertEqual(bitboard.search(x, o), (6, -1))
+
+        # A line is found even when an earlier row is empty
+        board = [[EMPTY, EMPTY, EMPTY],
+                 [X, X, X],
+                 [O, O, EMPTY]]
+        self.assertEqual(winner(board), X)
+        self.assertTrue(terminal(board))
+        self.assertEqual(utility(board), 1)
+        self.assertEqual(player(board), None)
+
+    def test_alpha_beta(self):
+        engine = bitboard.AlphaBeta()
+        self.assertEqual(engine.best_move(0, 0), (0, 0))
+        self.assertLess(engine.nodes, 5000)
+
+        # The search plays and takes back moves on one Board, so only the
+        # root allocates: with a threshold of 1, every container object
+        # allocated runs a collection
+        engine = bitboard.AlphaBeta()
+        gc.collect()
+        collections = gc.get_stats()[0]["collections"]
+        threshold = gc.get_threshold()
+        gc.set_threshold(1)
+        try:
+            self.assertEqual(engine.optimal_moves(0, 0), (0b111111111, 0))
+        finally:
+            gc.set_threshold(*threshold)
+        self.assertGreater(engine.nodes, 5000)
+        self.assertLess(gc.get_stats()[0]["collections"] - collections, 100)
+
+        # Every reachable position gets the answer of a full minimax search
+        def full_search(x, o):
+            maximizing = bitboard.x_to_move(x, o)
+            best = None
+            for cell in bitboard.moves(x, o):
+                child = (x | 1 << cell, o) if maximizing else (x, o | 1 << cell)
+                if bitboard.terminal(*child):
+                    util = bitboard.utility(*child)
+                else:
+                    util = full_search(*child)[1]
+                if best is None or (util > best[1] if maximizing else util < best[1]):
+                    best = (cell, util)
+            return best
+
+        boards = [(0b000000001, 0b000010000), (0b100001010, 0b000010100),
+                  (0b000000110, 0b100001000), (0b000010001, 0b100000010)]
+        for x, o in boards:
+            self.assertEqual(engine.best_move(x, o), full_search(x, o))
+
+    def test_symmetry(self):
+        x, o = 0b000000011, 0b000010000
+        canonical = bitboard.canonical(x, o)
+        for symmetry in range(8):
+            variant = (bitboard.transform(x, symmetry), bitboard.transform(o, symmetry))
+            self.assertEqual(bitboard.canonical(*variant)[:2], canonical[:2])
+            self.assertEqual(bitboard.transform(variant[0], bitboard.INVERSES[symmetry]), x)
+
+        # Variants share one table entry, yet each gets its own first best move
+        self.without_book()
+        tictactoe.table.clear()
+        for symmetry in range(8):
+            board = tictactoe.from_bitboard(bitboard.transform(x, symmetry),
+                                            bitboard.transform(o, symmetry))
+            cell, util = bitboard.AlphaBeta().best_move(*tictactoe.to_bitboard(board))
+            self.assertEqual(minimax(board), divmod(cell, 3))
+        self.assertEqual(len(tictactoe.table), 1)
+
+    def test_opening_book(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tictactoe.book")
+            self.assertIsNone(book.load(path))
+            book.build(path)
+            entries = book.load(path)
+            self.assertEqual(len(entries), 3 ** 9)
+
+            engine = bitboard.AlphaBeta()
+            reached = 0
+            for key in range(3 ** 9):
+                entry = book.lookup(entries, key)
+                if entry is None:
+                    continue
+                reached += 1
+                x = sum(1 << cell for cell in range(9) if key // bitboard.POW3[cell] % 3 == 1)
+                o = sum(1 << cell for cell in range(9) if key // bitboard.POW3[cell] % 3 == 2)
+                self.assertEqual(entry, engine.best_move(x, o))
+            self.assertEqual(reached, 4520)
+            self.assertIsNone(book.lookup(entries, 1 + 3))
+
+        # The shipped book gives the same moves as searching
+        if tictactoe.get_book() is not None:
+            boards = ([[None, "X", "O"], ["X", "O", None], [None, None, "X"]],
+                      [[None, "X", "X"], ["O", None, None], [None, None, "O"]])
+            expected = [tictactoe.search(board) for board in boards]
+            self.without_book()
+            self.assertEqual([tictactoe.search(board) for board in boards], expected)
+
+    def test_mnk_game(self):
+        X = "X"
+        O = "O"
+        EMPTY = None
+
+        game = mnk.Game()
+        self.assertEqual(len(game.lines), 8)
+        self.assertEqual(game.order, (4, 0, 2, 6, 8, 1, 3, 5, 7))
+        search = mnk.Search(game, time_limit=10)
+        self.assertEqual(search.best_move(0, 0), (4, 0))
+        self.assertEqual(search.depth, 9)
+        search = mnk.Search(game, time_limit=10, max_depth=1)
+        self.assertEqual(search.best_move(0, 0)[0], 4)
+        self.assertEqual(search.depth, 1)
+        with self.assertRaises(ValueError):
+            mnk.Search(game, max_depth=0)
+
+        game = mnk.Game(4, 4, 4)
+        self.assertEqual(len(game.lines), 10)
+        board = [[X, X, X, EMPTY],
+                 [O, O, O, EMPTY],
+                 [EMPTY, EMPTY, EMPTY, EMPTY],
+                 [EMPTY, EMPTY, EMPTY, EMPTY]]
+        self.assertEqual(game.player(board), X)
+        self.assertEqual(game.winner(game.result(board, (0, 3))), X)
+        self.assertEqual(mnk.minimax(game, board), (0, 3))
+        board[0][3] = O
+        board[3][0] = X
+        self.assertEqual(mnk.minimax(game, board), (1, 3))
+
+        # 3 in a row on 4x4 is a first player win
+        search = mnk.Search(mnk.Game(4, 4, 3), time_limit=10)
+        cell, score = search.best_move(0, 0)
+        self.assertEqual(score, mnk.WIN - 5)
+
+        # Large boards stop at the time limit with a heuristic move
+        calls = []
+
+        def heuristic(game, x, o):
+            calls.append((x, o))
+            return mnk.open_lines(game, x, o)
+
+        search = mnk.Search(mnk.Game(15, 15, 5), heuristic, time_limit=0.2)
+        start = time.perf_counter()
+        cell, score = search.best_move(0, 0)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(cell, 112)
+        self.assertGreater(len(calls), 0)
+        self.assertLess(search.depth, 225)
+
+        with self.assertRaises(ValueError):
+            mnk.Game(3, 3, 4)
+
+    def test_tournament(self):
+        results = tournament.tournament("minimax", "random", games=10, processes=2)
+        self.assertEqual(results["wins"] + results["draws"] + results["losses"], 10)
+        self.assertEqual(results["losses"], 0)
+        self.assertEqual(results["first"]["agent"], "minimax")
+        self.assertGreater(results["second"]["moves"], 0)
+        self.assertIsNone(results["second"]["nodes_per_second"])
+
+        # Without the book every minimax move is searched
+        results = tournament.tournament("minimax", "random", games=4, processes=2,
+                                        use_book=False)
+        self.assertEqual(results["losses"], 0)
+        self.assertGreater(results["first"]["nodes"], 0)
+        self.assertGreater(results["first"]["nodes_per_second"], 0)
+
+        results = tournament.tournament("alphabeta", "alphabeta", games=2, processes=1)
+        self.assertEqual(results["draws"], 2)
+        self.assertGreater(results["first"]["nodes_per_second"], 0)
+
+        with self.assertRaises(ValueError):
+            tournament.tournament("minimax", "random", rows=4, columns=4, k=4)
+        with self.assertRaises(ValueError):
+            tournament.tournament("minimax", "greedy")
+
+    def test_board_apply_undo(self):
+        X = "X"
+        O = "O"
+        EMPTY = None
+
+        board = tictactoe.Board()
+        states = [board.state()]
+        for action in [(1, 1), (0, 0), (0, 2), (2, 0), (1, 0), (1, 2), (2, 2), (0, 1)]:
+            self.assertEqual(board.turn, player(states[-1]))
+            board.apply(action)
+            states.append(result(states[-1], action))
+            self.assertEqual(board.state(), states[-1])
+            self.assertEqual(board.terminal(), terminal(states[-1]))
+        self.assertFalse(board.terminal())
+        self.assertEqual(board.actions(), [(2, 1)])
+
+        # Undo restores every counter
+        fresh = tictactoe.Board(board.state())
+        board.apply((2, 1))
+        self.assertTrue(board.terminal())
+        self.assertEqual(winner(board), None)
+        board.undo()
+        self.assertEqual((board.x, board.o, board.count, board.turn, board.lines, board.won),
+                         (fresh.x, fresh.o, fresh.count, fresh.turn, fresh.lines, fresh.won))
+
+        board = tictactoe.Board([[X, X, EMPTY],
+                                 [O, O, EMPTY],
+                                 [EMPTY, EMPTY, EMPTY]])
+        self.assertEqual(minimax(board), (0, 2))
+        self.assertEqual(getMax(board), getMax(board.state()))
+        board.apply((0, 2))
+        self.assertEqual(board.won, X)
+        self.assertEqual(winner(board), X)
+        self.assertIsNone(player(board))
+        with self.assertRaises(NameError):
+            board.apply((1, 2))
+        board.undo()
+        self.assertIsNone(board.won)
+        with self.assertRaises(NameError):
+            board.apply((0, 0))
+        self.assertEqual(board.history, [])
+
 
 if __name__ == '__main__':
     unittest.main()
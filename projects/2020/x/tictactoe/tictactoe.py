@@ -1,13 +1,70 @@
 """
 Tic Tac Toe Player
 """
-import copy
 import math
+from collections import OrderedDict
+
+import bitboard
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Maximum number of positions kept in the transposition table; the
+# 5478 legal positions have 765 up to symmetry, so by default all fit
+TABLE_SIZE = 1024
+
+
+class TranspositionTable():
+    """
+    Bounded cache of searched positions, mapping the key of a board to the
+    best moves and utility found for it. When full, the least recently
+    used position is evicted.
+    """
+
+    def __init__(self, maxsize=TABLE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the (moves, utility) stored for a key, or None.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, moves, util):
+        self.entries[key] = (moves, util)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Shared by getMax and getMin: answers found so far for boards up to
+# symmetry, and the search engine, whose `nodes` counts the boards it visited
+table = TranspositionTable()
+engine = bitboard.AlphaBeta()
+
+# Opening book entries, loaded on first use; None if there is no book
+opening_book = None
+book_loaded = False
+
 
 def initial_state():
     """
@@ -18,33 +75,99 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
+def to_bitboard(board):
+    """
+    Returns the (x, o) bitboards of a board, see bitboard.py.
+    """
+    if isinstance(board, Board):
+        return board.x, board.o
+    x = 0
+    o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def from_bitboard(x, o):
+    """
+    Returns the board of a pair of (x, o) bitboards.
+    """
+    board = initial_state()
+    for cell in range(9):
+        if x >> cell & 1:
+            board[cell // 3][cell % 3] = X
+        elif o >> cell & 1:
+            board[cell // 3][cell % 3] = O
+    return board
+
+
+class Board(bitboard.Board):
+    """
+    Mutable board to play on in place: apply() makes a move and undo()
+    takes back the last one. Instead of copying the board, they update
+    the counters of bitboard.Board, the board AlphaBeta searches on.
+
+    A Board can be passed to player, actions, winner, terminal, utility,
+    minimax, getMax and getMin; result still needs a list board.
+    """
+
+    def __init__(self, board=None):
+        x, o = to_bitboard(board) if board is not None else (0, 0)
+        super().__init__(x, o)
+
+    @property
+    def turn(self):
+        return (X, O)[self.side]
+
+    @property
+    def won(self):
+        return None if self.winner is None else (X, O)[self.winner]
+
+    def apply(self, action):
+        """
+        Makes move (i, j) for the side to move.
+        """
+        (i, j) = action
+        if i < 0 or i > 2 or j < 0 or j > 2:
+            raise NameError('Not a valid action for the given board')
+        cell = 3 * i + j
+        if (self.x | self.o) >> cell & 1 or self.winner is not None:
+            raise NameError('Not a valid action for the given board')
+        self.play(cell)
+
+    def terminal(self):
+        return self.winner is not None or self.count == 9
+
+    def actions(self):
+        """
+        Returns the empty cells (i, j) in order, or None if the game is over.
+        """
+        if self.terminal():
+            return None
+        return [divmod(cell, 3) for cell in bitboard.moves(self.x, self.o)]
+
+    def state(self):
+        """
+        Returns the board as a list of lists, like initial_state.
+        """
+        return from_bitboard(self.x, self.o)
+
+
 # Implemented by me
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-
-    # Check if board is terminal board
-    if terminal(board):
+    x, o = to_bitboard(board)
+    if bitboard.terminal(x, o):
         return None
-    # Check if board is in the initial state
-    if board == initial_state():
-        return X
-
-    # Determine how often each player has played
-    num_x = 0
-    num_o = 0
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == X:
-                num_x = num_x + 1
-            if board[i][j] == O:
-                num_o = num_o + 1
-
-    if num_o < num_x:
-        return O
-    else:
-        return X
+    return X if bitboard.x_to_move(x, o) else O
 
 
 # Implemented by me
@@ -52,18 +175,10 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    # Check if the board is not a terminal board
-    if terminal(board):
+    x, o = to_bitboard(board)
+    if bitboard.terminal(x, o):
         return None
-
-    action = []
-
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
-                action.append((i, j))
-
-    return action
+    return [divmod(cell, 3) for cell in bitboard.moves(x, o)]
 
 
 # Implemented by me
@@ -77,7 +192,7 @@ def result(board, action):
     if board[i][j] is not EMPTY:
         raise NameError('Not a valid action for the given board')
 
-    new_board = copy.deepcopy(board)
+    new_board = [list(row) for row in board]
     new_board[i][j] = player(board)
     return new_board
 
@@ -87,17 +202,11 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for i in range(3):
-        if board[i][0] == board[i][1] == board[i][2]:
-            return board[i][0]
-        if board[0][i] == board[1][i] == board[2][i]:
-            return board[0][i]
-
-    if board[0][0] == board[1][1] == board[2][2]:
-        return board[0][0]
-    if board[2][0] == board[1][1] == board[0][2]:
-        return board[2][0]
-
+    util = bitboard.utility(*to_bitboard(board))
+    if util == 1:
+        return X
+    if util == -1:
+        return O
     return None
 
 
@@ -106,17 +215,7 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    # Determine if there is a winner
-    if winner(board):
-        return True
-
-    # Determine if the game is a tie
-    tie = True
-    for i in range(3):
-        for j in range(3):
-            tie = tie and (board[i][j] is not EMPTY)
-
-    return tie
+    return bitboard.terminal(*to_bitboard(board))
 
 
 # Implemented by me
@@ -124,15 +223,15 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
+    return bitboard.utility(*to_bitboard(board))
 
-    tmp = winner(board)
 
-    if tmp == X:
-        return 1
-    elif tmp == O:
-        return -1
-    else:
-        return 0
+def board_key(board):
+    """
+    Returns an integer that identifies a board: its cells read
+    as a base-3 number, with 0 for EMPTY, 1 for X and 2 for O.
+    """
+    return bitboard.index(*to_bitboard(board))
 
 
 # Implemented by me
@@ -154,56 +253,61 @@ def minimax(board):
 
 # Implemented by me
 def getMax(board):
+    """
+    Returns the best action for X and the utility of the board,
+    or (None, -1) if it is not X's turn.
+    """
     if player(board) is not X:
         return None, -1
-
-    act = actions(board)
-    action = act[0]
-    util = -1
-    for a in act:
-        new_board = result(board, a)
-
-        if terminal(new_board):
-            u = utility(new_board)
-            if util < u:
-                util = u
-                action = a
-        else:
-            (x, u) = getMin(new_board)
-            if util < u:
-                util = u
-                action = a
-
-        if util is 1:
-            break
-
-    return action, util
+    return search(board)
 
 
 # Implemented by me
 def getMin(board):
+    """
+    Returns the best action for O and the utility of the board,
+    or (None, 1) if it is not O's turn.
+    """
     if player(board) is not O:
         return None, 1
+    return search(board)
 
-    act = actions(board)
-    action = act[0]
-    util = 1
-    for a in act:
-        new_board = result(board, a)
 
-        if terminal(new_board):
-            u = utility(new_board)
-            if util > u:
-                util = u
-                action = a
-        else:
-            (x, u) = getMax(new_board)
-            if util > u:
-                util = u
-                action = a
+def get_book():
+    """
+    Returns the opening book, memory-mapping it on the first call.
+    """
+    global opening_book, book_loaded
+    if not book_loaded:
+        opening_book = book.load()
+        book_loaded = True
+    return opening_book
 
-        if util is -1:
-            break
 
-    return action, util
+def search(board):
+    """
+    Looks a board that is not terminal up in the opening book, or
+    searches it on its bitboards if it is not there.
 
+    All symmetric variants of a board share the table entry of the
+    canonical one, which holds every best move. These are mapped back to
+    the board, where the first one in order is played.
+    """
+    x, o = to_bitboard(board)
+    entries = get_book()
+    if entries is not None:
+        entry = book.lookup(entries, bitboard.index(x, o))
+        if entry is not None:
+            cell, util = entry
+            return divmod(cell, 3), util
+
+    x, o, symmetry = bitboard.canonical(x, o)
+    key = bitboard.index(x, o)
+    entry = table.get(key)
+    if entry is None:
+        entry = engine.optimal_moves(x, o)
+        table.put(key, *entry)
+    moves, util = entry
+    moves = bitboard.transform(moves, bitboard.INVERSES[symmetry])
+    cell = (moves & -moves).bit_length() - 1
+    return divmod(cell, 3), util
@@ -0,0 +1,184 @@
+"""
+Headless tournament between Tic Tac Toe AIs
+
+Plays games between two agents over a pool of worker processes, swapping
+who plays X every game, and reports wins, draws and losses, the average
+move latency and the nodes searched per second of each agent. Every game
+starts with an empty transposition table, and with --no-book minimax
+searches every move instead of answering from the opening book.
+
+Agents are given as specs:
+    minimax          tictactoe.minimax (3x3 only): opening book and table
+    alphabeta        a fresh bitboard.AlphaBeta search every move (3x3 only)
+    mnk[:seconds]    mnk.Search with a time limit, default 0.1s
+    random           a random legal move
+    epsilon[:e]      random with probability e (default 0.1), else minimax
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+import bitboard
+import mnk
+import tictactoe
+
+
+class Agent():
+    """
+    An AI that picks moves for a game; move() returns the action and
+    the number of nodes searched to find it.
+    """
+
+    def __init__(self, spec, game):
+        name, _, parameter = spec.partition(":")
+        if name in ("minimax", "alphabeta", "epsilon") and \
+                (game.rows, game.columns, game.k) != (3, 3, 3):
+            raise ValueError(f"The {name} agent only plays 3x3 Tic Tac Toe")
+        if name == "mnk":
+            self.time_limit = float(parameter or 0.1)
+        elif name == "epsilon":
+            self.epsilon = float(parameter or 0.1)
+        elif name not in ("minimax", "alphabeta", "random"):
+            raise ValueError(f"Unknown agent: {spec}")
+        self.name = name
+        self.game = game
+
+    def move(self, board, rng):
+        if self.name == "random" or \
+                (self.name == "epsilon" and rng.random() < self.epsilon):
+            return rng.choice(self.game.actions(board)), 0
+        if self.name in ("minimax", "epsilon"):
+            nodes = tictactoe.engine.nodes
+            action = tictactoe.minimax(board)
+            return action, tictactoe.engine.nodes - nodes
+        if self.name == "alphabeta":
+            engine = bitboard.AlphaBeta()
+            cell, util = engine.best_move(*tictactoe.to_bitboard(board))
+            return divmod(cell, 3), engine.nodes
+
+        search = mnk.Search(self.game, time_limit=self.time_limit)
+        cell, score = search.best_move(*self.game.to_bitboard(board))
+        return divmod(cell, self.game.columns), search.nodes
+
+
+def play_game(task):
+    """
+    Plays one game between two agent specs, the first playing X.
+
+    Returns the winner (X, O or None) and, for each agent,
+    its move count, total move time in seconds and nodes searched.
+    """
+    x_spec, o_spec, rows, columns, k, use_book, seed = task
+    if not use_book:
+        tictactoe.opening_book, tictactoe.book_loaded = None, True
+    # Searches must not find the positions of earlier games in the table
+    tictactoe.table.clear()
+    game = mnk.Game(rows, columns, k)
+    agents = {tictactoe.X: Agent(x_spec, game), tictactoe.O: Agent(o_spec, game)}
+    stats = {tictactoe.X: [0, 0.0, 0], tictactoe.O: [0, 0.0, 0]}
+    rng = random.Random(seed)
+
+    board = game.initial_state()
+    while not game.terminal(board):
+        turn = game.player(board)
+        start = time.perf_counter()
+        action, nodes = agents[turn].move(board, rng)
+        elapsed = time.perf_counter() - start
+        board = game.result(board, action)
+        stats[turn][0] += 1
+        stats[turn][1] += elapsed
+        stats[turn][2] += nodes
+
+    return game.winner(board), stats[tictactoe.X], stats[tictactoe.O]
+
+
+def tournament(first, second, games=100, rows=3, columns=3, k=3,
+               processes=None, seed=0, use_book=True):
+    """
+    Plays `games` games between two agent specs, alternating who plays X,
+    spread over a pool of `processes` worker processes. Unless `use_book`,
+    minimax ignores the opening book.
+
+    Returns a JSON-serializable dictionary with the wins, draws and losses
+    of the first agent and the move statistics of both.
+    """
+    # Check the specs before starting the workers
+    game = mnk.Game(rows, columns, k)
+    Agent(first, game)
+    Agent(second, game)
+
+    tasks = []
+    for i in range(games):
+        players = (first, second) if i % 2 == 0 else (second, first)
+        tasks.append((*players, rows, columns, k, use_book, seed + i))
+
+    wins = draws = losses = 0
+    moves = {"first": [0, 0.0, 0], "second": [0, 0.0, 0]}
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.imap(play_game, tasks, chunksize=max(1, games // 64))
+        for i, (winner, x_stats, o_stats) in enumerate(results):
+            first_plays_x = i % 2 == 0
+            if winner is None:
+                draws += 1
+            elif (winner == tictactoe.X) == first_plays_x:
+                wins += 1
+            else:
+                losses += 1
+            first_stats, second_stats = (x_stats, o_stats) if first_plays_x else (o_stats, x_stats)
+            for total, stats in ((moves["first"], first_stats), (moves["second"], second_stats)):
+                for field in range(3):
+                    total[field] += stats[field]
+    elapsed = time.perf_counter() - start
+
+    def summary(spec, stats):
+        count, seconds, nodes = stats
+        return {
+            "agent": spec,
+            "moves": count,
+            "average_move_ms": 1000 * seconds / count if count else None,
+            "nodes": nodes,
+            # Agents that never search have no search speed
+            "nodes_per_second": nodes / seconds if nodes and seconds else None,
+        }
+
+    return {
+        "games": games,
+        "board": [rows, columns, k],
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed else None,
+        "first": summary(first, moves["first"]),
+        "second": summary(second, moves["second"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a tournament between two Tic Tac Toe agents.")
+    parser.add_argument("first", help="agent spec, such as minimax or epsilon:0.2")
+    parser.add_argument("second", help="agent spec, such as random or mnk:0.05")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, nargs=2, default=(3, 3), metavar=("ROWS", "COLUMNS"))
+    parser.add_argument("--k", type=int, default=3, help="length of a winning line")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-book", dest="use_book", action="store_false",
+                        help="make minimax search instead of using the opening book")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = tournament(args.first, args.second, args.games, *args.size, args.k,
+                         args.processes, args.seed, args.use_book)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, separators=(",", ":"))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()